@@ -27,17 +27,27 @@ output/monthly-graphs/
 
 from __future__ import annotations
 
+import heapq
 import json
 import os
+import pickle
+import shutil
+import sys
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import re
 
 import networkx as nx
+from tqdm import tqdm
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def sanitize_graphml_attributes(g: nx.Graph) -> None:
@@ -73,6 +83,155 @@ def sanitize_graphml_attributes(g: nx.Graph) -> None:
                 else:
                     pass
 
+
+# GraphML 属性类型（与 nx.write_graphml 的推断保持一致，便于 nx.read_graphml 读回同样的类型）
+_GRAPHML_XML_TYPES = {
+    bool: "boolean",
+    int: "long",
+    float: "double",
+    str: "string",
+}
+
+_GRAPHML_HEADER = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+    'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n'
+)
+
+
+def _graphml_value(v: Any) -> Any:
+    """按 sanitize_graphml_attributes 的规则清洗单个属性值（不修改原图）。"""
+    if isinstance(v, str) or v is None:
+        return _sanitize_xml_text(v)
+    if isinstance(v, (dict, list)):
+        return _sanitize_xml_text(json.dumps(v, ensure_ascii=False))
+    return v
+
+
+def _graphml_value_type(v: Any) -> type:
+    """清洗后属性值的类型（字符串/None/容器清洗后均为 str），用于声明 key 时避免重复清洗。"""
+    if v is None or isinstance(v, (str, dict, list)):
+        return str
+    return type(v)
+
+
+def _xml_escape_text(text: str) -> str:
+    """XML 文本节点转义（与 ElementTree 一致，只转义 & < >）。"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _xml_escape_attr(text: str) -> str:
+    """XML 属性值转义（与 ElementTree 一致）。"""
+    return (text
+            .replace("&", "&amp;")
+            .replace("<", "&lt;")
+            .replace(">", "&gt;")
+            .replace('"', "&quot;")
+            .replace("\r", "&#13;")
+            .replace("\n", "&#10;")
+            .replace("\t", "&#09;")
+            )
+
+
+def write_graphml_stream(g: nx.Graph, path: str) -> None:
+    """
+    流式写出 GraphML，等价于 sanitize_graphml_attributes(g) + nx.write_graphml(g, path)
+
+    nx.write_graphml 会先在内存中构建完整的 ElementTree（每个节点/边/属性一个 Element），
+    大图时峰值内存远高于图本身。这里分两遍处理：
+    1. 第一遍只收集 (属性名, 类型, 作用域) 生成 <key> 声明（GraphML 要求 key 在 graph 之前）
+    2. 第二遍逐个节点/边直接写入文件
+
+    属性值的清洗规则与 sanitize_graphml_attributes 相同，但不修改原图。
+    写出失败时删除半成品文件，避免留下不完整的 GraphML。
+    """
+    multigraph = g.is_multigraph()
+    keys: Dict[Tuple[str, str, str], str] = {}
+
+    def _key_id(name: str, value_type: type, scope: str) -> str:
+        xml_type = _GRAPHML_XML_TYPES.get(value_type)
+        if xml_type is None:
+            raise TypeError(f"GraphML does not support type {value_type} as data values.")
+        kk = (name, xml_type, scope)
+        key_id = keys.get(kk)
+        if key_id is None:
+            key_id = f"d{len(keys)}"
+            keys[kk] = key_id
+        return key_id
+
+    # 第一遍：收集 key 声明
+    graph_data = [
+        (str(k), _graphml_value(v))
+        for k, v in g.graph.items()
+        if k not in ("node_default", "edge_default", "id")
+    ]
+    for k, v in graph_data:
+        _key_id(k, type(v), "graph")
+    for _, attrs in g.nodes(data=True):
+        for k, v in attrs.items():
+            _key_id(str(k), _graphml_value_type(v), "node")
+    edge_iter = g.edges(keys=True, data=True) if multigraph else g.edges(data=True)
+    for edge in edge_iter:
+        for k, v in edge[-1].items():
+            _key_id(str(k), _graphml_value_type(v), "edge")
+
+    def _data_lines(attrs: Dict[str, Any], scope: str, indent: str) -> List[str]:
+        out = []
+        for k, v in attrs.items():
+            v = _graphml_value(v)
+            key_id = keys[(str(k), _GRAPHML_XML_TYPES[type(v)], scope)]
+            out.append(f'{indent}<data key="{key_id}">{_xml_escape_text(str(v))}</data>\n')
+        return out
+
+    edgedefault = "directed" if g.is_directed() else "undirected"
+    try:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(_GRAPHML_HEADER)
+            for (name, xml_type, scope), key_id in keys.items():
+                f.write(
+                    f'  <key id="{key_id}" for="{scope}" '
+                    f'attr.name="{_xml_escape_attr(name)}" attr.type="{xml_type}" />\n'
+                )
+            f.write(f'  <graph edgedefault="{edgedefault}">\n')
+            for k, v in graph_data:
+                key_id = keys[(k, _GRAPHML_XML_TYPES[type(v)], "graph")]
+                f.write(f'    <data key="{key_id}">{_xml_escape_text(str(v))}</data>\n')
+
+            for node, attrs in g.nodes(data=True):
+                node_id = _xml_escape_attr(str(node))
+                if attrs:
+                    f.write(f'    <node id="{node_id}">\n')
+                    f.writelines(_data_lines(attrs, "node", "      "))
+                    f.write("    </node>\n")
+                else:
+                    f.write(f'    <node id="{node_id}" />\n')
+
+            edge_iter = g.edges(keys=True, data=True) if multigraph else g.edges(data=True)
+            for edge in edge_iter:
+                source = _xml_escape_attr(str(edge[0]))
+                target = _xml_escape_attr(str(edge[1]))
+                attrs = edge[-1]
+                if multigraph:
+                    head = f'    <edge source="{source}" target="{target}" id="{_xml_escape_attr(str(edge[2]))}"'
+                else:
+                    head = f'    <edge source="{source}" target="{target}"'
+                if attrs:
+                    f.write(head + ">\n")
+                    f.writelines(_data_lines(attrs, "edge", "      "))
+                    f.write("    </edge>\n")
+                else:
+                    f.write(head + " />\n")
+
+            f.write("  </graph>\n</graphml>\n")
+    except Exception:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
 from src.utils.logger import get_logger
 
 logger = get_logger()
@@ -212,8 +371,7 @@ def get_processed_months(output_dir: str) -> Set[str]:
     index_file = output_path / "index.json"
     if index_file.exists():
         try:
-            with open(index_file, "r", encoding="utf-8") as f:
-                index = json.load(f)
+            index = _read_index_file(index_file)
             # 收集所有已处理的月份
             for repo_name, graph_types in index.items():
                 for graph_type, months in graph_types.items():
@@ -221,9 +379,160 @@ def get_processed_months(output_dir: str) -> Set[str]:
         except Exception:
             pass
     
+    # 尚未合并的增量索引（中断的流式任务）同样视为已处理
+    for delta_file in sorted(output_path.glob(_INDEX_DELTA_GLOB)):
+        for record in _read_index_delta(delta_file):
+            processed.add(record["month"])
+    
     return processed
 
 
+# ==================== 增量索引 ====================
+
+def _read_index_file(index_file: Path) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """读取 index.json（优先使用 orjson，未安装时回退到标准库 json）"""
+    if orjson is not None:
+        with open(index_file, "rb") as f:
+            return orjson.loads(f.read())
+    with open(index_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_index_file(index: Dict[str, Dict[str, Dict[str, str]]], index_file: Path) -> None:
+    """写出 index.json（2 空格缩进、非 ASCII 原样保留；优先使用 orjson）"""
+    if orjson is not None:
+        with open(index_file, "wb") as f:
+            f.write(orjson.dumps(index, option=orjson.OPT_INDENT_2))
+        return
+    with open(index_file, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+
+
+_INDEX_DELTA_GLOB = "index.delta.*.json"
+
+
+def _write_index_delta(output_path: Path, records: List[Tuple[str, str, str, str]]) -> Optional[Path]:
+    """
+    把本次新生成的图写入增量索引文件（NDJSON，每行一条记录）
+    
+    只写新增条目，不重写完整的 index.json；由 compact_index 统一合并。
+    
+    Args:
+        output_path: 输出目录
+        records: [(repo_name, graph_type, month, path)]
+    
+    Returns:
+        增量文件路径；无记录时返回 None
+    """
+    if not records:
+        return None
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    delta_file = output_path / f"index.delta.{timestamp}.json"
+    with open(delta_file, "w", encoding="utf-8") as f:
+        for repo_name, graph_type, month, path in records:
+            f.write(json.dumps(
+                {"repo": repo_name, "graph_type": graph_type, "month": month, "path": path},
+                ensure_ascii=False,
+            ))
+            f.write("\n")
+    return delta_file
+
+
+def _read_index_delta(delta_file: Path) -> List[Dict[str, str]]:
+    """读取增量索引文件，忽略写入中断产生的不完整行"""
+    records = []
+    with open(delta_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _index_sources_signature(output_path: Path) -> Tuple:
+    """index.json 与增量文件的 (文件名, 修改时间, 大小)，用于判断缓存是否失效"""
+    files = [output_path / "index.json"] + sorted(output_path.glob(_INDEX_DELTA_GLOB))
+    signature = []
+    for file_path in files:
+        try:
+            st = file_path.stat()
+        except OSError:
+            continue
+        signature.append((file_path.name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def _merge_index_sources(
+    output_path: Path,
+    merge_existing: bool = True,
+) -> Tuple[Dict[str, Dict[str, Dict[str, str]]], List[Path]]:
+    """读取 index.json（可选）并依次应用所有增量文件，返回 (索引, 已应用的增量文件)"""
+    index_file = output_path / "index.json"
+    
+    index: Dict[str, Dict[str, Dict[str, str]]] = {}
+    if merge_existing and index_file.exists():
+        index = _read_index_file(index_file)
+    
+    delta_files = sorted(output_path.glob(_INDEX_DELTA_GLOB))
+    for delta_file in delta_files:
+        for record in _read_index_delta(delta_file):
+            index.setdefault(record["repo"], {}).setdefault(record["graph_type"], {})[record["month"]] = record["path"]
+    return index, delta_files
+
+
+# load_index 的缓存：{输出目录: (来源文件签名, 索引)}
+_INDEX_CACHE: Dict[str, Tuple[Tuple, Dict[str, Dict[str, Dict[str, str]]]]] = {}
+
+
+def load_index(output_dir: str) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    读取完整索引：index.json 加上尚未合并的增量文件（不改写任何文件）
+    
+    结果按来源文件的修改时间/大小缓存，文件未变化时直接返回缓存。
+    
+    Returns:
+        {repo_name: {graph_type: {month: graph_path}}}
+    """
+    output_path = Path(output_dir)
+    cache_key = str(output_path.resolve())
+    signature = _index_sources_signature(output_path)
+    cached = _INDEX_CACHE.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    index, _ = _merge_index_sources(output_path)
+    _INDEX_CACHE[cache_key] = (signature, index)
+    return index
+
+
+def compact_index(output_dir: str, merge_existing: bool = True) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    合并 index.json 与所有增量索引文件，写出新的 index.json 并删除已合并的增量文件
+    
+    Args:
+        output_dir: 输出目录
+        merge_existing: 是否以现有 index.json 为基础（False 时只保留增量中的条目）
+    
+    Returns:
+        合并后的索引 {repo_name: {graph_type: {month: graph_path}}}
+    """
+    output_path = Path(output_dir)
+    index_file = output_path / "index.json"
+    index, delta_files = _merge_index_sources(output_path, merge_existing)
+    
+    tmp_file = output_path / "index.json.tmp"
+    _write_index_file(index, tmp_file)
+    os.replace(tmp_file, index_file)
+    
+    for delta_file in delta_files:
+        delta_file.unlink()
+    
+    return index
+
+
 def load_month_data(data_dir: str, month: str) -> Dict[str, List[Dict]]:
     """只加载指定月份的数据
     
@@ -283,6 +592,40 @@ def group_by_month_and_repo(
 
 # ==================== 图构建函数 ====================
 
+def _add_multiedges_unchecked(
+    graph: nx.MultiDiGraph,
+    edges: Iterable[Tuple[str, str, str, Dict[str, Any]]],
+) -> None:
+    """
+    批量向 MultiDiGraph 写入边，直接操作邻接字典（_node/_succ/_pred）
+    
+    跳过 add_edge 的逐条检查和缓存清理，语义与逐条 add_edge(u, v, key=key, **attrs) 相同：
+    缺失的端点自动补为无属性节点；_succ[u][v] 与 _pred[v][u] 共享同一个 keydict；
+    相同 key 的边合并属性。属性字典直接作为边数据保存，调用方不应再复用它。
+    """
+    node = graph._node
+    succ = graph._succ
+    pred = graph._pred
+    for u, v, key, attrs in edges:
+        if u not in succ:
+            succ[u] = {}
+            pred[u] = {}
+            node[u] = {}
+        if v not in succ:
+            succ[v] = {}
+            pred[v] = {}
+            node[v] = {}
+        keydict = succ[u].get(v)
+        if keydict is None:
+            keydict = succ[u][v] = pred[v][u] = {}
+        datadict = keydict.get(key)
+        if datadict is None:
+            keydict[key] = attrs
+        else:
+            datadict.update(attrs)
+    nx._clear_cache(graph)
+
+
 def _clean_text_for_xml(text: str) -> str:
     """
     清理文本中的控制字符，使其可以作为 XML 文本安全写入
@@ -333,6 +676,19 @@ def _escape_xml_text(text: str) -> str:
             .replace('"', "&quot;")
             .replace("'", "&apos;")
             )
+# XML 1.0 不允许的字符 -> None（用于 str.translate）：
+# \t \n \r 以外的 C0 控制字符、surrogate（0xD800-0xDFFF）、0xFFFE/0xFFFF
+_XML_INVALID_CHARS_TABLE: Dict[int, None] = {
+    code: None
+    for code in [
+        *(c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D)),
+        *range(0xD800, 0xE000),
+        0xFFFE,
+        0xFFFF,
+    ]
+}
+
+
 def _sanitize_xml_text(text: str) -> str:
     """清洗 GraphML/XML 中不合法字符，并转义 XML 特殊字符。
 
@@ -345,28 +701,8 @@ def _sanitize_xml_text(text: str) -> str:
     if not isinstance(text, str):
         text = str(text)
 
-    # 1) 移除 XML 1.0 不允许的字符
-    # 允许：\t \n \r；以及 U+0020 以上的常规字符（并排除 surrogate 区）
-    cleaned_chars = []
-    for ch in text:
-        code = ord(ch)
-        if ch in ("\t", "\n", "\r"):
-            cleaned_chars.append(ch)
-            continue
-        # 基本可见字符
-        if 0x20 <= code <= 0xD7FF:
-            cleaned_chars.append(ch)
-            continue
-        # 排除 surrogate：0xD800-0xDFFF
-        if 0xE000 <= code <= 0xFFFD:
-            cleaned_chars.append(ch)
-            continue
-        # 非 BMP 字符（Python 可表示）
-        if 0x10000 <= code <= 0x10FFFF:
-            cleaned_chars.append(ch)
-            continue
-        # 其它：丢弃
-    text = "".join(cleaned_chars)
+    # 1) 移除 XML 1.0 不允许的字符（查表在 C 层完成，非 BMP 字符保留）
+    text = text.translate(_XML_INVALID_CHARS_TABLE)
 
     # 2) 转义 XML 特殊字符（GraphML 本质是 XML）
     return (text
@@ -408,7 +744,8 @@ def _sanitize_comment_text(text: str) -> str:
     )
 
 
-def build_actor_actor_graph(
+def populate_actor_actor_graph(
+    graph: nx.MultiDiGraph,
     events: List[Dict],
     repo_name: str,
     month: str,
@@ -421,8 +758,10 @@ def build_actor_actor_graph(
     - PR_REVIEW: 审查他人的 PR
     - PR_MERGE: 合并他人的 PR
     - ISSUE_CO_PARTICIPANT: 同 Issue 下的参与者
+    
+    传入的 graph 会先被 clear() 再重新填充，便于批量构建时复用同一个图对象。
     """
-    graph = nx.MultiDiGraph()
+    graph.clear()
     actors: Dict[int, ActorStats] = {}
     
     issue_creators: Dict[int, int] = {}
@@ -565,18 +904,31 @@ def build_actor_actor_graph(
         actors_with_edges.add(edge["source"])
         actors_with_edges.add(edge["target"])
     
+    # 节点 ID 字符串只生成一次，边复用同一个对象（字典查找可直接按身份命中）
+    actor_node_ids: Dict[int, str] = {}
     for actor_id in actors_with_edges:
+        node_id = actor_node_ids[actor_id] = f"actor:{actor_id}"
         if actor_id in actors:
-            graph.add_node(f"actor:{actor_id}", **actors[actor_id].to_dict())
+            graph.add_node(node_id, **actors[actor_id].to_dict())
+    
+    # 热循环：函数绑定到局部变量，边直接写入邻接字典
+    _sanitize = _sanitize_xml_text
+    
+    def _edge_rows():
+        for edge_data in edges:
+            edge_type = edge_data["edge_type"]
+            yield (
+                actor_node_ids[edge_data["source"]],
+                actor_node_ids[edge_data["target"]],
+                f"{edge_type}_{edge_data['event_id']}",
+                {
+                    "edge_type": edge_type,
+                    "created_at": edge_data.get("created_at") or "",
+                    "comment_body": _sanitize(edge_data.get("comment_body", "")),
+                },
+            )
     
-    for edge_data in edges:
-        source = f"actor:{edge_data['source']}"
-        target = f"actor:{edge_data['target']}"
-        edge_key = f"{edge_data['edge_type']}_{edge_data['event_id']}"
-        graph.add_edge(source, target, key=edge_key,
-                       edge_type=edge_data["edge_type"],
-                       created_at=edge_data.get("created_at") or "",
-                       comment_body=_sanitize_xml_text(edge_data.get("comment_body", "")))
+    _add_multiedges_unchecked(graph, _edge_rows())
     
     graph.graph["repo_name"] = _sanitize_xml_text(repo_name)
     graph.graph["month"] = _sanitize_xml_text(month)
@@ -586,7 +938,17 @@ def build_actor_actor_graph(
     return graph
 
 
-def build_actor_repo_graph(
+def build_actor_actor_graph(
+    events: List[Dict],
+    repo_name: str,
+    month: str,
+) -> nx.MultiDiGraph:
+    """构建新的 actor-actor 图（见 populate_actor_actor_graph）"""
+    return populate_actor_actor_graph(nx.MultiDiGraph(), events, repo_name, month)
+
+
+def populate_actor_repo_graph(
+    graph: nx.MultiDiGraph,
     events: List[Dict],
     repo_name: str,
     month: str,
@@ -596,8 +958,10 @@ def build_actor_repo_graph(
     
     边类型：基于事件类型（PUSH, CREATE, ISSUE, PR, COMMENT 等）
     新增：边包含详细统计信息（commit_count, pr_merged 等）
+    
+    传入的 graph 会先被 clear() 再重新填充，便于批量构建时复用同一个图对象。
     """
-    graph = nx.MultiDiGraph()
+    graph.clear()
     actors: Dict[int, ActorStats] = {}
     repos: Dict[int, RepoStats] = {}
     edges: List[Dict] = []
@@ -704,34 +1068,45 @@ def build_actor_repo_graph(
             "is_comment": is_comment,
         })
     
-    # 添加节点
+    # 添加节点（节点 ID 字符串只生成一次，边复用同一个对象）
+    actor_node_ids: Dict[int, str] = {}
     for actor_id, actor_stats in actors.items():
-        graph.add_node(f"actor:{actor_id}", **actor_stats.to_dict())
+        node_id = actor_node_ids[actor_id] = f"actor:{actor_id}"
+        graph.add_node(node_id, **actor_stats.to_dict())
     
+    repo_node_ids: Dict[int, str] = {}
     for repo_id, repo_stats in repos.items():
-        graph.add_node(f"repo:{repo_id}", **repo_stats.to_dict())
-    
-    # 添加边（每条事件仍然是独立的边，但包含统计信息）
-    for edge_data in edges:
-        source = f"actor:{edge_data['actor_id']}"
-        target = f"repo:{edge_data['repo_id']}"
-        edge_key = f"{edge_data['edge_type']}_{edge_data['event_id']}"
-        graph.add_edge(
-            source, 
-            target, 
-            key=edge_key,
-            edge_type=edge_data["edge_type"],
-            created_at=edge_data.get("created_at") or "",
-            comment_body=_sanitize_xml_text(edge_data.get("comment_body", "")),
-            # 新增：统计信息
-            commit_count=edge_data.get("commit_count", 0),
-            pr_merged=edge_data.get("pr_merged", 0),
-            pr_opened=edge_data.get("pr_opened", 0),
-            pr_closed=edge_data.get("pr_closed", 0),
-            issue_opened=edge_data.get("issue_opened", 0),
-            issue_closed=edge_data.get("issue_closed", 0),
-            is_comment=edge_data.get("is_comment", 0),
-        )
+        node_id = repo_node_ids[repo_id] = f"repo:{repo_id}"
+        graph.add_node(node_id, **repo_stats.to_dict())
+    
+    # 添加边（每条事件仍然是独立的边，但包含统计信息），直接写入邻接字典
+    _sanitize = _sanitize_xml_text
+    
+    def _edge_rows():
+        for edge_data in edges:
+            edge_type = edge_data["edge_type"]
+            actor_id = edge_data["actor_id"]
+            repo_id = edge_data["repo_id"]
+            yield (
+                actor_node_ids.get(actor_id) or f"actor:{actor_id}",
+                repo_node_ids.get(repo_id) or f"repo:{repo_id}",
+                f"{edge_type}_{edge_data['event_id']}",
+                {
+                    "edge_type": edge_type,
+                    "created_at": edge_data["created_at"] or "",
+                    "comment_body": _sanitize(edge_data["comment_body"]),
+                    # 新增：统计信息
+                    "commit_count": edge_data["commit_count"],
+                    "pr_merged": edge_data["pr_merged"],
+                    "pr_opened": edge_data["pr_opened"],
+                    "pr_closed": edge_data["pr_closed"],
+                    "issue_opened": edge_data["issue_opened"],
+                    "issue_closed": edge_data["issue_closed"],
+                    "is_comment": edge_data["is_comment"],
+                },
+            )
+    
+    _add_multiedges_unchecked(graph, _edge_rows())
     
     graph.graph["repo_name"] = _sanitize_xml_text(repo_name)
     graph.graph["month"] = _sanitize_xml_text(month)
@@ -741,7 +1116,17 @@ def build_actor_repo_graph(
     return graph
 
 
-def build_actor_discussion_graph(
+def build_actor_repo_graph(
+    events: List[Dict],
+    repo_name: str,
+    month: str,
+) -> nx.MultiDiGraph:
+    """构建新的 actor-repo 图（见 populate_actor_repo_graph）"""
+    return populate_actor_repo_graph(nx.MultiDiGraph(), events, repo_name, month)
+
+
+def populate_actor_discussion_graph(
+    graph: nx.MultiDiGraph,
     events: List[Dict],
     repo_name: str,
     month: str,
@@ -751,8 +1136,10 @@ def build_actor_discussion_graph(
     
     节点：Actor, Issue, PullRequest
     边：CREATED, COMMENTED, REVIEWED, CLOSED, MERGED
+    
+    传入的 graph 会先被 clear() 再重新填充，便于批量构建时复用同一个图对象。
     """
-    graph = nx.MultiDiGraph()
+    graph.clear()
     actors: Dict[int, ActorStats] = {}
     discussions: Dict[str, DiscussionStats] = {}
     edges: List[Dict] = []
@@ -943,22 +1330,34 @@ def build_actor_discussion_graph(
                     "comment_body": comment_body,
                 })
     
-    # 添加节点
+    # 添加节点（节点 ID 字符串只生成一次，边复用同一个对象）
+    actor_node_ids: Dict[int, str] = {}
     for actor_id, actor_stats in actors.items():
-        graph.add_node(f"actor:{actor_id}", **actor_stats.to_dict())
+        node_id = actor_node_ids[actor_id] = f"actor:{actor_id}"
+        graph.add_node(node_id, **actor_stats.to_dict())
     
     for key, disc_stats in discussions.items():
         graph.add_node(key, **disc_stats.to_dict())
     
-    # 添加边
-    for edge_data in edges:
-        source = f"actor:{edge_data['actor_id']}"
-        target = edge_data["discussion_key"]
-        edge_key = f"{edge_data['edge_type']}_{edge_data['event_id']}"
-        graph.add_edge(source, target, key=edge_key,
-                       edge_type=edge_data["edge_type"],
-                       created_at=edge_data.get("created_at") or "",
-                       comment_body=_sanitize_xml_text(edge_data.get("comment_body", "")))
+    # 添加边（直接写入邻接字典）
+    _sanitize = _sanitize_xml_text
+    
+    def _edge_rows():
+        for edge_data in edges:
+            edge_type = edge_data["edge_type"]
+            actor_id = edge_data["actor_id"]
+            yield (
+                actor_node_ids.get(actor_id) or f"actor:{actor_id}",
+                edge_data["discussion_key"],
+                f"{edge_type}_{edge_data['event_id']}",
+                {
+                    "edge_type": edge_type,
+                    "created_at": edge_data.get("created_at") or "",
+                    "comment_body": _sanitize(edge_data.get("comment_body", "")),
+                },
+            )
+    
+    _add_multiedges_unchecked(graph, _edge_rows())
     
     graph.graph["repo_name"] = _sanitize_xml_text(repo_name)
     graph.graph["month"] = _sanitize_xml_text(month)
@@ -968,8 +1367,114 @@ def build_actor_discussion_graph(
     return graph
 
 
+def build_actor_discussion_graph(
+    events: List[Dict],
+    repo_name: str,
+    month: str,
+) -> nx.MultiDiGraph:
+    """构建新的 actor-discussion 图（见 populate_actor_discussion_graph）"""
+    return populate_actor_discussion_graph(nx.MultiDiGraph(), events, repo_name, month)
+
+
 # ==================== 主流程 ====================
 
+# 图类型 -> 构建函数（populate_* 复用传入的图对象）
+_BUILDER_MAP = {
+    "actor-actor": populate_actor_actor_graph,
+    "actor-repo": populate_actor_repo_graph,
+    "actor-discussion": populate_actor_discussion_graph,
+}
+
+# 事件数少于该值的项目-月份不构建图
+_MIN_REPO_EVENTS = 3
+
+
+def _prepare_type_dirs(
+    output_path: Path,
+    repo_names: Set[str],
+    graph_types: List[str],
+) -> Dict[Tuple[str, str], Path]:
+    """为每个 (项目, 图类型) 只创建一次输出目录，返回 {(repo_name, graph_type): type_dir}"""
+    type_dirs = {}
+    for repo_name in repo_names:
+        repo_dir = output_path / repo_name.replace("/", "-")
+        for graph_type in graph_types:
+            type_dir = repo_dir / graph_type
+            os.makedirs(type_dir, exist_ok=True)
+            type_dirs[(repo_name, graph_type)] = type_dir
+    return type_dirs
+
+
+def _graph_file_tasks(
+    repo_name: str,
+    month: str,
+    graph_types: List[str],
+    type_dirs: Dict[Tuple[str, str], Path],
+) -> List[Tuple[str, str]]:
+    """生成某个项目-月份的 [(graph_type, graph_file)]，供工作进程直接使用"""
+    return [
+        (graph_type, str(type_dirs[(repo_name, graph_type)] / f"{month}.graphml"))
+        for graph_type in graph_types
+    ]
+
+
+# 会在 Actor-Discussion 图中产生 Issue/PR 节点的事件类型
+_DISCUSSION_EVENT_TYPES = frozenset({
+    "IssuesEvent",
+    "IssueCommentEvent",
+    "PullRequestEvent",
+    "PullRequestReviewCommentEvent",
+})
+
+
+def _quick_graph_size_estimate(events: List[Dict], graph_type: str) -> int:
+    """
+    扫描一遍事件，估计图节点数的上界（只区分 0/1/≥2，达到 2 即返回 2）
+    
+    用于在构建前跳过必然少于 2 个节点的图（这类图构建后也会被丢弃）：
+    - actor-repo：任一事件同时带 actor 与 repo 即至少 2 个节点
+    - actor-actor：边只连接不同的 actor，参与的 actor（含 issue/PR 创建者）不足 2 个时没有边
+    - actor-discussion：有 actor 的讨论类事件可能产生 actor + 讨论两个节点；否则只有 actor 节点
+    估计是保守的：无法确定时返回 2，交给实际构建判断。
+    """
+    if graph_type == "actor-repo":
+        for event in events:
+            if (event.get("actor") or {}).get("id") is not None and (event.get("repo") or {}).get("id") is not None:
+                return 2
+        return 0
+    if graph_type not in ("actor-actor", "actor-discussion"):
+        return 2
+    
+    actor_ids = set()
+    for event in events:
+        actor_id = (event.get("actor") or {}).get("id")
+        if actor_id is not None:
+            if graph_type == "actor-discussion" and event.get("type") in _DISCUSSION_EVENT_TYPES:
+                return 2
+            actor_ids.add(actor_id)
+        payload = event.get("payload") or {}
+        for field_name in ("issue", "pull_request"):
+            user_id = ((payload.get(field_name) or {}).get("user") or {}).get("id")
+            if user_id:
+                actor_ids.add(user_id)
+        if len(actor_ids) >= 2:
+            return 2
+    return len(actor_ids)
+
+
+def _drop_small_repos(
+    monthly_repo_data: Dict[str, Dict[str, List[Dict]]],
+) -> Tuple[Dict[str, Dict[str, List[Dict]]], int]:
+    """一次性过滤掉事件太少的项目，返回 (过滤后的数据, 被过滤的项目-月份数)"""
+    filtered = {}
+    dropped = 0
+    for month, repos in monthly_repo_data.items():
+        kept = {r: e for r, e in repos.items() if len(e) >= _MIN_REPO_EVENTS}
+        dropped += len(repos) - len(kept)
+        filtered[month] = kept
+    return filtered, dropped
+
+
 def _filter_months(
     monthly_repo_data: Dict[str, Dict[str, List[Dict]]],
     start_month: Optional[str] = None,
@@ -995,6 +1500,7 @@ def build_monthly_graphs(
     start_month: Optional[str] = None,
     end_month: Optional[str] = None,
     merge_index: bool = True,
+    finalize_index: bool = True,
 ) -> Dict[str, Dict[str, Dict[str, str]]]:
     """
     构建所有项目的月度图（三类）
@@ -1006,6 +1512,8 @@ def build_monthly_graphs(
         start_month: 只构建该月及之后的图 (YYYY-MM)
         end_month: 只构建该月及之前的图 (YYYY-MM)
         merge_index: 若输出目录已有 index.json，是否合并而非覆盖
+        finalize_index: 是否在结束时合并增量索引到 index.json；为 False 时只写增量文件，
+            之后用 compact_index（或 --compact-index）统一合并（merge_index=False 时总会合并）
     
     Returns:
         {repo_name: {graph_type: {month: graph_path}}}
@@ -1016,12 +1524,9 @@ def build_monthly_graphs(
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # 图构建函数映射
-    builder_map = {
-        "actor-actor": build_actor_actor_graph,
-        "actor-repo": build_actor_repo_graph,
-        "actor-discussion": build_actor_discussion_graph,
-    }
+    # 只保留已知的图类型；每种图类型复用同一个图对象，避免每个项目-月份重复分配
+    graph_types = [gt for gt in graph_types if gt in _BUILDER_MAP]
+    graph_pool = {gt: nx.MultiDiGraph() for gt in graph_types}
     
     # 加载数据
     print("加载过滤后的数据...")
@@ -1036,14 +1541,23 @@ def build_monthly_graphs(
         monthly_repo_data = _filter_months(monthly_repo_data, start_month, end_month)
         print(f"月份过滤: {start_month or '不限'} ~ {end_month or '不限'}，共 {len(monthly_repo_data)} 个月")
     
+    # 跳过事件太少的项目
+    monthly_repo_data, skipped_count = _drop_small_repos(monthly_repo_data)
+    
     # 统计
     total_combos = sum(len(repos) for repos in monthly_repo_data.values())
     total_graphs = total_combos * len(graph_types)
     print(f"将构建约 {total_graphs} 个图（{len(monthly_repo_data)} 个月 × 多个项目 × {len(graph_types)} 种图）")
     
-    result = defaultdict(lambda: defaultdict(dict))
+    # 输出目录每个 (项目, 图类型) 只创建一次
+    type_dirs = _prepare_type_dirs(
+        output_path,
+        {repo_name for repos in monthly_repo_data.values() for repo_name in repos},
+        graph_types,
+    )
+    
+    result: Dict[str, Dict[str, Dict[str, str]]] = {}
     graph_count = 0
-    skipped_count = 0
     error_count = 0
     
     # 计算总任务数
@@ -1060,33 +1574,28 @@ def build_monthly_graphs(
         print(f"该月份包含 {repos_in_month} 个项目")
         print(f"{'='*60}")
         
-        for repo_idx, (repo_name, events) in enumerate(repos.items(), 1):
-            if len(events) < 3:  # 跳过事件太少的
-                skipped_count += 1
-                continue
-            
-            safe_repo_name = repo_name.replace("/", "-")
-            repo_dir = output_path / safe_repo_name
-            
+        # 进度条只在终端中显示；重定向到日志文件时自动关闭
+        repo_iter = tqdm(
+            repos.items(),
+            desc=month,
+            total=repos_in_month,
+            leave=False,
+            disable=not sys.stdout.isatty(),
+        )
+        for repo_idx, (repo_name, events) in enumerate(repo_iter, 1):
             graphs_built_for_repo = []
             
-            for graph_type in graph_types:
-                builder = builder_map.get(graph_type)
-                if not builder:
+            for graph_type, graph_file in _graph_file_tasks(repo_name, month, graph_types, type_dirs):
+                # 必然少于 2 个节点的图直接跳过，不必构建
+                if _quick_graph_size_estimate(events, graph_type) < 2:
+                    skipped_count += 1
                     continue
                 
-                # 创建图类型目录
-                type_dir = repo_dir / graph_type
-                type_dir.mkdir(parents=True, exist_ok=True)
-                
                 # 构建图
                 try:
-                    import sys
-                    sys.stdout.write(f"\r    构建 {graph_type}...")
-                    sys.stdout.flush()
-                    graph = builder(events, repo_name, month)
+                    graph = _BUILDER_MAP[graph_type](graph_pool[graph_type], events, repo_name, month)
                 except Exception as e:
-                    print(f"\n    警告: 构建图失败 {repo_name}/{graph_type}/{month}: {e}")
+                    tqdm.write(f"    警告: 构建图失败 {repo_name}/{graph_type}/{month}: {e}")
                     error_count += 1
                     continue
                 
@@ -1096,27 +1605,24 @@ def build_monthly_graphs(
                     continue
                 
                 # 保存
-                graph_file = type_dir / f"{month}.graphml"
                 try:
-                    sanitize_graphml_attributes(graph)
-                    nx.write_graphml(graph, str(graph_file))
+                    write_graphml_stream(graph, graph_file)
 
-                    result[repo_name][graph_type][month] = str(graph_file)
+                    result.setdefault(repo_name, {}).setdefault(graph_type, {})[month] = graph_file
                     graph_count += 1
                     graphs_built_for_repo.append(graph_type)
 
                 except Exception as e:
-                    print(f"\n    警告: 保存图失败 {graph_file}: {e}")
+                    tqdm.write(f"    警告: 保存图失败 {graph_file}: {e}")
                     error_count += 1
                     continue
 
             
             # 每处理一个项目输出进度
             if graphs_built_for_repo:
-                # 清除当前行并打印完成信息
-                print(
-                    f"\r  [{repo_idx}/{repos_in_month}] {repo_name}: "
-                    f"{len(events)} 事件 → {', '.join(graphs_built_for_repo)}          "
+                tqdm.write(
+                    f"  [{repo_idx}/{repos_in_month}] {repo_name}: "
+                    f"{len(events)} 事件 → {', '.join(graphs_built_for_repo)}"
                 )
         
         # 每个月结束时输出统计
@@ -1131,63 +1637,79 @@ def build_monthly_graphs(
     print(f"  涉及项目: {len(result)} 个")
     print("=" * 60)
     
-    # 保存索引（若已有则合并）
+    # 保存索引：先写增量，再统一合并（若已有则合并）
     index_file = output_path / "index.json"
-    to_save = {k: dict(v) for k, v in result.items()}
-    if merge_index and index_file.exists():
-        with open(index_file, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-        for repo, graph_types_dict in to_save.items():
-            if repo not in existing:
-                existing[repo] = {}
-            for gt, months in graph_types_dict.items():
-                existing[repo].setdefault(gt, {}).update(months)
-        to_save = existing
-        print(f"已合并到现有索引")
-    with open(index_file, "w", encoding="utf-8") as f:
-        json.dump(to_save, f, indent=2, ensure_ascii=False)
+    _write_index_delta(output_path, [
+        (repo, gt, m, path)
+        for repo, graph_types_dict in result.items()
+        for gt, months in graph_types_dict.items()
+        for m, path in months.items()
+    ])
+    if merge_index and not finalize_index:
+        print(f"增量索引已写入，稍后运行 --compact-index 合并到 {index_file}")
+    else:
+        compact_index(str(output_path), merge_existing=merge_index)
+        if merge_index:
+            print(f"已合并到现有索引")
+        print(f"索引已保存: {index_file}")
     
-    print(f"索引已保存: {index_file}")
+    return result
+
+
+def _dump_events_cache(cache_dir: Path, repo_name: str, month: str, events: List[Dict]) -> str:
+    """
+    把一个项目-月份的事件写入缓存文件，返回文件路径
     
-    return dict(result)
+    并行任务只传递缓存路径，避免主进程把大量事件 pickle 后经管道发送给工作进程；
+    工作进程直接从磁盘读取（同一文件在 OS 页缓存中共享）。
+    """
+    repo_cache_dir = cache_dir / repo_name.replace("/", "-")
+    repo_cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_file = repo_cache_dir / f"{month}.pkl"
+    with open(cache_file, "wb") as f:
+        pickle.dump(events, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return str(cache_file)
+
+
+def _load_events_cache(cache_file: str) -> List[Dict]:
+    """读取 _dump_events_cache 写出的事件缓存"""
+    with open(cache_file, "rb") as f:
+        return pickle.load(f)
+
+
+# 工作进程内复用的图对象（每种图类型一个，进程间不共享）
+_WORKER_GRAPH_POOL: Dict[str, nx.MultiDiGraph] = {}
 
 
 def _process_single_repo(args_tuple):
-    """处理单个项目（用于并行）"""
-    repo_name, events, month, graph_types, output_path = args_tuple
+    """处理单个项目（用于并行）
     
-    builder_map = {
-        "actor-actor": build_actor_actor_graph,
-        "actor-repo": build_actor_repo_graph,
-        "actor-discussion": build_actor_discussion_graph,
-    }
-    
-    safe_repo_name = repo_name.replace("/", "-")
-    repo_dir = output_path / safe_repo_name
+    args_tuple: (repo_name, events_cache_file, month, [(graph_type, graph_file)])，
+    输出目录已由主进程创建好。
+    """
+    repo_name, cache_file, month, graph_files = args_tuple
+    events = _load_events_cache(cache_file)
     
     results = []
     
-    for graph_type in graph_types:
-        builder = builder_map.get(graph_type)
-        if not builder:
+    for graph_type, graph_file in graph_files:
+        if _quick_graph_size_estimate(events, graph_type) < 2:
             continue
         
-        type_dir = repo_dir / graph_type
-        type_dir.mkdir(parents=True, exist_ok=True)
-        
+        graph = _WORKER_GRAPH_POOL.get(graph_type)
+        if graph is None:
+            graph = _WORKER_GRAPH_POOL[graph_type] = nx.MultiDiGraph()
         try:
-            graph = builder(events, repo_name, month)
+            _BUILDER_MAP[graph_type](graph, events, repo_name, month)
         except Exception as e:
             continue
         
         if graph.number_of_nodes() < 2:
             continue
         
-        graph_file = type_dir / f"{month}.graphml"
         try:
-            sanitize_graphml_attributes(graph)
-            nx.write_graphml(graph, str(graph_file))
-            results.append((repo_name, graph_type, month, str(graph_file)))
+            write_graphml_stream(graph, graph_file)
+            results.append((repo_name, graph_type, month, graph_file))
         except:
             continue
 
@@ -1195,6 +1717,42 @@ def _process_single_repo(args_tuple):
     return results
 
 
+def _bundle_tasks(sized_tasks: List[Tuple[int, Any]], n_bundles: int) -> List[List[Any]]:
+    """
+    把任务按事件数打包成约 n_bundles 个任务包（LPT：从大到小依次放入当前负载最小的包）
+    
+    小项目-月份很多，一任务一提交时进程间通信开销占主导；打包后每个包的事件总量接近均衡。
+    
+    Args:
+        sized_tasks: [(事件数, task)]
+        n_bundles: 目标包数
+    """
+    n_bundles = max(1, min(n_bundles, len(sized_tasks)))
+    heap = [(0, i) for i in range(n_bundles)]
+    bundles: List[List[Any]] = [[] for _ in range(n_bundles)]
+    for size, task in sorted(sized_tasks, key=lambda x: x[0], reverse=True):
+        load, i = heapq.heappop(heap)
+        bundles[i].append(task)
+        heapq.heappush(heap, (load + size, i))
+    return [b for b in bundles if b]
+
+
+def _process_repo_bundle(bundle):
+    """处理一个任务包（用于并行），返回所有项目的结果；单个项目失败不影响包内其它项目"""
+    results = []
+    for args_tuple in bundle:
+        try:
+            results.extend(_process_single_repo(args_tuple))
+        except Exception:
+            continue
+    return results
+
+
+def _bundle_repo_names(bundle) -> str:
+    """任务包内的项目名（去重、保持顺序），用于错误日志"""
+    return ", ".join(dict.fromkeys(args_tuple[0] for args_tuple in bundle))
+
+
 def build_monthly_graphs_parallel(
     data_dir: str = "data/filtered/",
     output_dir: str = "output/monthly-graphs/",
@@ -1203,9 +1761,10 @@ def build_monthly_graphs_parallel(
     start_month: Optional[str] = None,
     end_month: Optional[str] = None,
     merge_index: bool = True,
+    finalize_index: bool = True,
 ) -> Dict[str, Dict[str, Dict[str, str]]]:
     """
-    并行构建所有项目的月度图
+    并行构建所有项目的月度图（参数同 build_monthly_graphs）
     """
     from concurrent.futures import ProcessPoolExecutor, as_completed
     
@@ -1226,36 +1785,68 @@ def build_monthly_graphs_parallel(
         monthly_repo_data = _filter_months(monthly_repo_data, start_month, end_month)
         print(f"月份过滤: {start_month or '不限'} ~ {end_month or '不限'}，共 {len(monthly_repo_data)} 个月")
     
-    # 准备所有任务
-    tasks = []
-    for month in sorted(monthly_repo_data.keys()):
-        repos = monthly_repo_data[month]
-        for repo_name, events in repos.items():
-            if len(events) >= 3:
-                tasks.append((repo_name, events, month, graph_types, output_path))
-    
-    total_tasks = len(tasks)
-    print(f"共 {total_tasks} 个任务，使用 {workers} 个进程并行处理")
-    
-    result = defaultdict(lambda: defaultdict(dict))
-    completed = 0
-    graph_count = 0
+    # 准备所有任务（跳过事件太少的项目；输出目录在分发前统一创建）
+    graph_types = [gt for gt in graph_types if gt in _BUILDER_MAP]
+    monthly_repo_data, _ = _drop_small_repos(monthly_repo_data)
+    type_dirs = _prepare_type_dirs(
+        output_path,
+        {repo_name for repos in monthly_repo_data.values() for repo_name in repos},
+        graph_types,
+    )
+    # 事件写入按项目-月份划分的缓存，任务只携带缓存路径
+    cache_dir = output_path / "_cache"
+    # 缓存是整个数据集的副本：中断或出错时也要清理，避免残留在输出目录
+    try:
+        sized_tasks = [
+            (
+                len(events),
+                (
+                    repo_name,
+                    _dump_events_cache(cache_dir, repo_name, month, events),
+                    month,
+                    _graph_file_tasks(repo_name, month, graph_types, type_dirs),
+                ),
+            )
+            for month in sorted(monthly_repo_data.keys())
+            for repo_name, events in monthly_repo_data[month].items()
+        ]
+        # 事件已落盘，释放主进程中的原始数据
+        del daily_data, monthly_repo_data
+    
+        # 按事件数打包成约 workers*4 个任务包
+        bundles = _bundle_tasks(sized_tasks, workers * 4)
+        total_tasks = len(sized_tasks)
+        print(f"共 {total_tasks} 个任务（{len(bundles)} 个任务包），使用 {workers} 个进程并行处理")
+    
+        result: Dict[str, Dict[str, Dict[str, str]]] = {}
+        completed = 0
+        graph_count = 0
     
-    with ProcessPoolExecutor(max_workers=workers) as executor:
-        futures = {executor.submit(_process_single_repo, task): task for task in tasks}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_process_repo_bundle, bundle): bundle for bundle in bundles}
         
-        for future in as_completed(futures):
-            completed += 1
-            try:
-                results = future.result()
+            progress = tqdm(total=total_tasks, disable=not sys.stdout.isatty())
+            for future in as_completed(futures):
+                completed += len(futures[future])
+                progress.update(len(futures[future]))
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # 一个任务包包含多个项目-月份，失败时中止，避免写出缺项的索引
+                    logger.error(f"任务包处理失败（{_bundle_repo_names(futures[future])}），错误: {e}")
+                    for pending in futures:
+                        pending.cancel()
+                    raise
                 for repo_name, graph_type, month, path in results:
-                    result[repo_name][graph_type][month] = path
+                    result.setdefault(repo_name, {}).setdefault(graph_type, {})[month] = path
                     graph_count += 1
-            except Exception as e:
-                pass
             
-            if completed % 20 == 0 or completed == total_tasks:
-                print(f"进度: {completed}/{total_tasks} ({completed*100//total_tasks}%), 已生成 {graph_count} 个图")
+                # 非终端（日志文件）时没有进度条，每完成一个任务包输出一次文本进度
+                if progress.disable:
+                    print(f"进度: {completed}/{total_tasks} ({completed*100//total_tasks}%), 已生成 {graph_count} 个图")
+            progress.close()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
     
     print("")
     print("=" * 60)
@@ -1264,25 +1855,23 @@ def build_monthly_graphs_parallel(
     print(f"  涉及项目: {len(result)} 个")
     print("=" * 60)
     
-    # 保存索引（若已有则合并）
+    # 保存索引：先写增量，再统一合并（若已有则合并）
     index_file = output_path / "index.json"
-    to_save = {k: dict(v) for k, v in result.items()}
-    if merge_index and index_file.exists():
-        with open(index_file, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-        for repo, graph_types_dict in to_save.items():
-            if repo not in existing:
-                existing[repo] = {}
-            for gt, months in graph_types_dict.items():
-                existing[repo].setdefault(gt, {}).update(months)
-        to_save = existing
-        print(f"已合并到现有索引")
-    with open(index_file, "w", encoding="utf-8") as f:
-        json.dump(to_save, f, indent=2, ensure_ascii=False)
-    
-    print(f"索引已保存: {index_file}")
+    _write_index_delta(output_path, [
+        (repo, gt, m, path)
+        for repo, graph_types_dict in result.items()
+        for gt, months in graph_types_dict.items()
+        for m, path in months.items()
+    ])
+    if merge_index and not finalize_index:
+        print(f"增量索引已写入，稍后运行 --compact-index 合并到 {index_file}")
+    else:
+        compact_index(str(output_path), merge_existing=merge_index)
+        if merge_index:
+            print(f"已合并到现有索引")
+        print(f"索引已保存: {index_file}")
     
-    return dict(result)
+    return result
 
 
 def build_monthly_graphs_streaming(
@@ -1293,6 +1882,7 @@ def build_monthly_graphs_streaming(
     start_month: Optional[str] = None,
     end_month: Optional[str] = None,
     skip_existing: bool = True,
+    finalize_index: bool = True,
 ) -> Dict[str, Dict[str, Dict[str, str]]]:
     """
     流式按月构建图：每次只加载一个月的数据，处理完后释放内存
@@ -1300,7 +1890,7 @@ def build_monthly_graphs_streaming(
     优点：
     1. 内存占用低：不需要一次性加载所有数据
     2. 支持断点续传：已处理的月份自动跳过
-    3. 每月处理完立即保存索引，避免中断丢失进度
+    3. 每月处理完立即写入增量索引，避免中断丢失进度
     
     Args:
         data_dir: 输入数据目录
@@ -1310,12 +1900,14 @@ def build_monthly_graphs_streaming(
         start_month: 起始月份 (YYYY-MM)
         end_month: 结束月份 (YYYY-MM)
         skip_existing: 是否跳过已处理的月份
+        finalize_index: 是否在结束时合并增量索引到 index.json
     """
     from concurrent.futures import ProcessPoolExecutor, as_completed
     import gc
     
     if graph_types is None:
         graph_types = ["actor-actor", "actor-repo", "actor-discussion"]
+    graph_types = [gt for gt in graph_types if gt in _BUILDER_MAP]
     
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -1347,86 +1939,115 @@ def build_monthly_graphs_streaming(
     
     if not months_to_process:
         print("没有需要处理的月份")
+        # 合并上次中断遗留的增量索引
+        if finalize_index and any(output_path.glob(_INDEX_DELTA_GLOB)):
+            compact_index(str(output_path))
         return {}
     
     print(f"将处理 {len(months_to_process)} 个月份")
     print("=" * 60)
     
-    # 加载或初始化索引
     index_file = output_path / "index.json"
-    if index_file.exists():
-        with open(index_file, "r", encoding="utf-8") as f:
-            global_index = json.load(f)
-    else:
-        global_index = {}
-    
     total_graph_count = 0
-    
-    for month_idx, month in enumerate(months_to_process, 1):
-        print(f"\n{'='*60}")
-        print(f"处理月份: {month} ({month_idx}/{len(months_to_process)})")
-        print(f"{'='*60}")
+    # 已创建输出目录的 (项目, 图类型)，跨月份复用
+    type_dirs: Dict[Tuple[str, str], Path] = {}
+    known_repos: Set[str] = set()
+    cache_dir = output_path / "_cache"
+    
+    # 中断或出错时也清理当月事件缓存，避免残留在输出目录
+    try:
+        for month_idx, month in enumerate(months_to_process, 1):
+            print(f"\n{'='*60}")
+            print(f"处理月份: {month} ({month_idx}/{len(months_to_process)})")
+            print(f"{'='*60}")
         
-        # 加载该月数据
-        repo_events = load_month_data(data_dir, month)
+            # 加载该月数据
+            repo_events = load_month_data(data_dir, month)
         
-        if not repo_events:
-            print(f"  月份 {month} 无数据，跳过")
-            continue
+            if not repo_events:
+                print(f"  月份 {month} 无数据，跳过")
+                continue
         
-        # 准备任务
-        tasks = []
-        for repo_name, events in repo_events.items():
-            if len(events) >= 3:
-                tasks.append((repo_name, events, month, graph_types, output_path))
+            # 准备任务
+            valid_repos = {r for r, e in repo_events.items() if len(e) >= _MIN_REPO_EVENTS}
+            type_dirs.update(_prepare_type_dirs(output_path, valid_repos - known_repos, graph_types))
+            known_repos |= valid_repos
+            sized_tasks = [
+                (
+                    len(events),
+                    (
+                        repo_name,
+                        _dump_events_cache(cache_dir, repo_name, month, events),
+                        month,
+                        _graph_file_tasks(repo_name, month, graph_types, type_dirs),
+                    ),
+                )
+                for repo_name, events in repo_events.items()
+                if repo_name in valid_repos
+            ]
         
-        if not tasks:
-            print(f"  月份 {month} 无有效项目，跳过")
-            # 释放内存
+            if not sized_tasks:
+                print(f"  月份 {month} 无有效项目，跳过")
+                # 释放内存
+                del repo_events
+                gc.collect()
+                continue
+        
+            # 事件已写入缓存，先释放主进程中的该月数据
             del repo_events
             gc.collect()
-            continue
         
-        print(f"  {len(tasks)} 个项目待处理，使用 {workers} 个进程")
+            bundles = _bundle_tasks(sized_tasks, workers * 4)
+            print(f"  {len(sized_tasks)} 个项目待处理（{len(bundles)} 个任务包），使用 {workers} 个进程")
         
-        # 并行处理该月的所有项目
-        month_graph_count = 0
-        completed = 0
+            # 并行处理该月的所有项目
+            month_graph_count = 0
+            month_records = []
+            completed = 0
         
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            futures = {executor.submit(_process_single_repo, task): task for task in tasks}
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_process_repo_bundle, bundle): bundle for bundle in bundles}
             
-            for future in as_completed(futures):
-                completed += 1
-                try:
-                    results = future.result()
-                    for repo_name, graph_type, m, path in results:
-                        # 更新索引
-                        if repo_name not in global_index:
-                            global_index[repo_name] = {}
-                        if graph_type not in global_index[repo_name]:
-                            global_index[repo_name][graph_type] = {}
-                        global_index[repo_name][graph_type][m] = path
-                        month_graph_count += 1
-                except Exception as e:
-                    pass
+                progress = tqdm(
+                    total=len(sized_tasks),
+                    desc=month,
+                    leave=False,
+                    disable=not sys.stdout.isatty(),
+                )
+                for future in as_completed(futures):
+                    completed += len(futures[future])
+                    progress.update(len(futures[future]))
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        # 一个任务包包含多个项目，失败时中止，避免写出缺项的增量索引
+                        logger.error(f"任务包处理失败（{month}: {_bundle_repo_names(futures[future])}），错误: {e}")
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    month_records.extend(results)
+                    month_graph_count += len(results)
                 
-                # 进度输出
-                if completed % 10 == 0 or completed == len(tasks):
-                    print(f"    进度: {completed}/{len(tasks)} 项目, {month_graph_count} 个图")
+                    # 进度输出（非终端时）
+                    if progress.disable:
+                        print(f"    进度: {completed}/{len(sized_tasks)} 项目, {month_graph_count} 个图")
+                progress.close()
         
-        total_graph_count += month_graph_count
-        print(f"  月份 {month} 完成: {month_graph_count} 个图")
+            total_graph_count += month_graph_count
+            print(f"  月份 {month} 完成: {month_graph_count} 个图")
         
-        # 每个月处理完保存一次索引（断点续传）
-        with open(index_file, "w", encoding="utf-8") as f:
-            json.dump(global_index, f, indent=2, ensure_ascii=False)
-        print(f"  索引已更新")
+            # 每个月处理完写一次增量索引（断点续传），最后统一合并到 index.json
+            _write_index_delta(output_path, month_records)
+            print(f"  增量索引已写入")
         
-        # 释放内存
-        del repo_events
-        del tasks
-        gc.collect()
+            # 释放内存并清理该月的事件缓存
+            del sized_tasks, bundles
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            gc.collect()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    
+    global_index = compact_index(str(output_path)) if finalize_index else load_index(str(output_path))
     
     print("\n" + "=" * 60)
     print("全部处理完成!")
@@ -1490,6 +2111,16 @@ if __name__ == "__main__":
         action="store_true",
         help="不合并到现有索引，直接覆盖（默认会合并）"
     )
+    parser.add_argument(
+        "--defer-index",
+        action="store_true",
+        help="只写增量索引文件，不在结束时重写 index.json（之后用 --compact-index 合并）"
+    )
+    parser.add_argument(
+        "--compact-index",
+        action="store_true",
+        help="只把增量索引合并到 index.json 后退出，不构建图"
+    )
     parser.add_argument(
         "--force",
         action="store_true",
@@ -1498,6 +2129,11 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
+    if args.compact_index:
+        index = compact_index(args.output_dir)
+        print(f"索引已合并: {Path(args.output_dir) / 'index.json'}（{len(index)} 个项目）")
+        raise SystemExit(0)
+    
     print("=" * 60)
     print("开始构建月度时序图")
     print(f"数据目录: {args.data_dir}")
@@ -1525,6 +2161,7 @@ if __name__ == "__main__":
             start_month=args.start_month,
             end_month=args.end_month,
             skip_existing=not args.force,
+            finalize_index=not args.defer_index,
         )
     elif args.serial:
         build_monthly_graphs(
@@ -1534,6 +2171,7 @@ if __name__ == "__main__":
             start_month=args.start_month,
             end_month=args.end_month,
             merge_index=merge_index,
+            finalize_index=not args.defer_index,
         )
     else:
         build_monthly_graphs_parallel(
@@ -1544,4 +2182,5 @@ if __name__ == "__main__":
             start_month=args.start_month,
             end_month=args.end_month,
             merge_index=merge_index,
+            finalize_index=not args.defer_index,
         )
\ No newline at end of file
@@ -20,21 +20,34 @@ Newcomer / Core-evolution analyzer (v4)
 
 from __future__ import annotations
 
+import hashlib
 import json
 import math
+import os
+import pickle
 import statistics
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import AbstractSet, Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import networkx as nx
+import numpy as np
 
 from src.utils.logger import get_logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = get_logger()
 
+# 图缓存只保留分析读取的节点属性；格式变化时递增版本号使旧缓存失效
+_GRAPH_CACHE_VERSION = 2
+_GRAPH_CACHE_NODE_ATTRS = ("node_type", "login", "actor_id")
+
 
 # =========================
 # 数据结构
@@ -57,6 +70,7 @@ class PreparedMonth:
     g_simple: nx.Graph
     core_node_ids: List[str]
     actor_nodes: List[str]  # 当月 Actor 节点（用于 reachability）
+    components: Optional[List[Set[str]]] = None  # g_simple 的连通分量（指标1/3共用）
 
 @dataclass
 class NewcomerDistanceRecord:
@@ -157,56 +171,211 @@ def _parse_actor_id(value: Any) -> int:
         return 0
 
 
-def _month_to_dt(month: str) -> datetime:
-    return datetime.strptime(month, "%Y-%m")
+def _month_to_int(month: str) -> int:
+    """YYYY-MM -> 自公元 0 年起的月序号（直接整数运算，不经过 strptime）"""
+    year, mon = month.split("-", 1)
+    return int(year) * 12 + int(mon) - 1
 
 
 def _months_diff(start_month: str, end_month: str) -> int:
     """end - start in months"""
-    s = _month_to_dt(start_month)
-    e = _month_to_dt(end_month)
-    return (e.year - s.year) * 12 + (e.month - s.month)
+    return _month_to_int(end_month) - _month_to_int(start_month)
+
+
+def _strip_graph(graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+    """只保留拓扑和 _GRAPH_CACHE_NODE_ATTRS 的同类型图（丢弃边属性，如评论正文）。
+
+    平行边与自环保留，度数与原图一致。
+    """
+    stripped = graph.__class__()
+    stripped.add_nodes_from(
+        (n, {k: attr[k] for k in _GRAPH_CACHE_NODE_ATTRS if k in attr})
+        for n, attr in graph.nodes(data=True)
+    )
+    stripped.add_edges_from(graph.edges())
+    return stripped
+
+
+def _dumps_json(data: Any, indent: bool = True) -> bytes:
+    """序列化为 UTF-8 JSON（非 ASCII 原样保留）；indent=True 时 2 空格缩进。优先使用 orjson。"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads_json(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _write_json(data: Any, path: Path) -> None:
+    """写出 JSON（2 空格缩进、非 ASCII 原样保留；优先使用 orjson，未安装时回退到标准库 json）"""
+    with open(path, "wb") as f:
+        f.write(_dumps_json(data))
+
+
+def _new_in_order(nodes: List[str], seen: AbstractSet[str]) -> List[str]:
+    """nodes 中不在 seen 里的节点，保持 nodes 原有顺序（批量做集合差，而不是逐个查表）。"""
+    new_set = set(nodes) - seen
+    if len(new_set) == len(nodes):
+        return list(nodes)
+    if not new_set:
+        return []
+    return [n for n in nodes if n in new_set]
 
 
 def _to_undirected_simple(graph: nx.MultiDiGraph) -> nx.Graph:
-    """将 MultiDiGraph 转为无向简单图：忽略方向、合并平行边。"""
-    return nx.Graph(graph.to_undirected())
+    """将 MultiDiGraph 转为无向简单图：忽略方向、合并平行边。
+
+    只保留拓扑（不复制节点/边属性），避免 to_undirected() 的整图深拷贝；
+    节点顺序与原图一致。
+    """
+    g_simple = nx.Graph()
+    g_simple.add_nodes_from(graph)
+    g_simple.add_edges_from(graph.edges())
+    return g_simple
+
+
+def _distances_to_core(
+    g_simple: nx.Graph,
+    sources: List[str],
+    core_node_ids: List[str],
+    components: Optional[List[Set[str]]] = None,
+) -> Dict[str, List[int]]:
+    """每个 source 到（除自身外）可达 core 的最短路径长度列表。
+
+    所有 BFS 在一次逐层遍历中批量完成：每个起点占一个 bit，节点上用整数位集
+    记录已到达的起点集合，一轮位运算同时推进全部起点的前沿。
+    无向图上距离对称：起点取 sources 与 core 中较少的一方；
+    某个起点的同分量目标全部找到后即停止扩展它的 bit，全部找齐后整体结束。
+    结果与逐个 BFS 一致。
+    components 可传入预先算好的连通分量。
+    """
+    result: Dict[str, List[int]] = {s: [] for s in sources}
+    if not sources or not core_node_ids:
+        return result
+
+    from_core = len(sources) > len(core_node_ids)
+    starts, ends = (core_node_ids, sources) if from_core else (sources, core_node_ids)
+    start_set = set(starts)
+    end_set = set(ends)
+
+    # 每个起点待找到的目标数：同一连通分量内、且不是同一节点；找齐的起点不再扩展
+    start_index = {s: i for i, s in enumerate(starts)}
+    remaining = [0] * len(starts)
+    if components is None:
+        components = list(nx.connected_components(g_simple))
+    for component in components:
+        n_ends = len(end_set & component)
+        if not n_ends:
+            continue
+        for s in start_set & component:
+            remaining[start_index[s]] = n_ends - (1 if s in end_set else 0)
+    pending = sum(remaining)
+    done = 0
+    for i, r in enumerate(remaining):
+        if r == 0:
+            done |= 1 << i
+
+    adj = g_simple.adj
+    reached: Dict[str, int] = {}
+    for i, s in enumerate(starts):
+        reached[s] = reached.get(s, 0) | (1 << i)
+    frontier = dict(reached)
+
+    level = 0
+    while frontier and pending:
+        level += 1
+        candidates: Dict[str, int] = {}
+        for u, bits in frontier.items():
+            bits &= ~done
+            if not bits:
+                continue
+            for v in adj[u]:
+                candidates[v] = candidates.get(v, 0) | bits
+
+        frontier = {}
+        for v, bits in candidates.items():
+            new_bits = bits & ~reached.get(v, 0)
+            if not new_bits:
+                continue
+            reached[v] = reached.get(v, 0) | new_bits
+            frontier[v] = new_bits
+            if v not in end_set:
+                continue
+            while new_bits:
+                low = new_bits & -new_bits
+                new_bits ^= low
+                i = low.bit_length() - 1
+                pending -= 1
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    done |= low
+                result[v if from_core else starts[i]].append(level)
+    return result
+
+
+def _count_unreachable_to_core(
+    g_simple: nx.Graph,
+    core_node_ids: List[str],
+    nodes: List[str],
+    components: Optional[List[Set[str]]] = None,
+) -> Tuple[int, int]:
+    """统计 nodes 中与所有 core 不可达 / 与至少一个 core 不可达的数量。
+
+    无向图中可达 core 数即所在连通分量内的 core 数：一次连通分量遍历后
+    按分量整体分类，不再对每个节点做 BFS。components 可传入预先算好的连通分量。
+    """
+    core_set = set(core_node_ids)
+    total_core = len(core_set)
+    targets = set(nodes)
+    unreach_all = 0
+    unreach_any = 0
+    if components is None:
+        components = list(nx.connected_components(g_simple))
+    for component in components:
+        n_targets = len(targets & component)
+        if n_targets == 0:
+            continue
+        n_core = len(core_set & component)
+        if n_core == 0:
+            unreach_all += n_targets
+            unreach_any += n_targets
+        elif n_core < total_core:
+            unreach_any += n_targets
+    return unreach_all, unreach_any
 
 
 def _linear_regression_slope(values: List[float]) -> float:
-    """简单线性回归斜率（x=0..n-1）。"""
+    """简单线性回归斜率（x=0..n-1）。
+
+    x 为等差序列，Σ(dx²) 有闭式解 n(n²-1)/12，Σ(dx·dy) = Σ(i·y) - n·x̄·ȳ，求和交给内置 sum。
+    """
     n = len(values)
     if n < 2:
         return 0.0
     x_mean = (n - 1) / 2.0
     y_mean = sum(values) / n
-    num = 0.0
-    den = 0.0
-    for i, y in enumerate(values):
-        dx = i - x_mean
-        dy = y - y_mean
-        num += dx * dy
-        den += dx * dx
-    return num / den if den != 0 else 0.0
+    num = sum([i * y for i, y in enumerate(values)]) - n * x_mean * y_mean
+    den = n * (n * n - 1) / 12.0
+    return num / den
 
 
 def _compute_volatility(values: List[float]) -> float:
     """环比变化率标准差；跳过 prev<=0。"""
     if len(values) < 3:
         return 0.0
-    changes: List[float] = []
-    for i in range(1, len(values)):
-        prev = values[i - 1]
-        cur = values[i]
-        if prev is None or cur is None:
-            continue
-        if prev <= 0:
-            continue
-        changes.append((cur - prev) / prev)
+    changes = [
+        (cur - prev) / prev
+        for prev, cur in zip(values, values[1:])
+        if prev is not None and cur is not None and prev > 0
+    ]
     if len(changes) < 2:
         return 0.0
     mean = sum(changes) / len(changes)
-    var = sum((c - mean) ** 2 for c in changes) / len(changes)
+    var = sum([(c - mean) ** 2 for c in changes]) / len(changes)
     return math.sqrt(var)
 
 
@@ -289,6 +458,23 @@ def compute_three_layer_analysis(
 # 主分析器
 # =========================
 
+def _analyze_repo_worker(args: tuple) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    多进程工作函数：分析单个项目（模块级别函数，只传路径等基础类型，避免 pickle 分析器实例）
+
+    Args:
+        args: 元组 (graphs_dir, output_dir, use_graph_cache, repo_name, months)
+    """
+    graphs_dir, output_dir, use_graph_cache, repo_name, months = args
+    analyzer = NewcomerAnalyzer(
+        graphs_dir=graphs_dir,
+        output_dir=output_dir,
+        use_graph_cache=use_graph_cache,
+        workers=1,
+    )
+    return repo_name, analyzer._analyze_single_repo(repo_name, months)
+
+
 class NewcomerAnalyzer:
     """
     计算三类指标：
@@ -301,19 +487,77 @@ class NewcomerAnalyzer:
         self,
         graphs_dir: str = "output/monthly-graphs/",
         output_dir: str = "output/newcomer-analysis/",
+        use_graph_cache: bool = True,
+        workers: Optional[int] = None,
+        stream_results: bool = False,
     ):
+        """
+        Args:
+            workers: 并行工作进程数（None 表示使用 CPU 核心数，1 表示单进程）
+            stream_results: 逐项目写盘（per_repo.jsonl），内存只保留摘要，适合大量项目
+        """
         self.graphs_dir = Path(graphs_dir)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.stream_results = stream_results
+        # 解析后的图以 pickle 缓存，重复运行时跳过 GraphML 的 XML 解析
+        self.use_graph_cache = use_graph_cache
+        self.graph_cache_dir = self.output_dir / "_graph_cache"
 
     # ---------- IO ----------
 
+    def _graph_cache_path(self, graph_path: str) -> Path:
+        key = hashlib.sha1(str(Path(graph_path).resolve()).encode("utf-8")).hexdigest()
+        return self.graph_cache_dir / f"{key}.pkl"
+
+    def _read_graph_cache(self, graph_path: str, stamp: Tuple[int, ...]) -> Optional[nx.MultiDiGraph]:
+        """缓存命中且 (格式版本, mtime_ns, size) 未变化时返回图，否则返回 None。"""
+        try:
+            with open(self._graph_cache_path(graph_path), "rb") as f:
+                cached_stamp, graph = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+        if tuple(cached_stamp) != stamp:
+            return None
+        return graph
+
+    def _write_graph_cache(self, graph_path: str, stamp: Tuple[int, ...], graph: nx.MultiDiGraph) -> None:
+        cache_path = self._graph_cache_path(graph_path)
+        tmp_path = cache_path.with_suffix(".tmp")
+        try:
+            self.graph_cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump((stamp, graph), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug(f"写入图缓存失败: {cache_path}, 错误: {e}")
+            tmp_path.unlink(missing_ok=True)
+
     def load_graph(self, graph_path: str) -> Optional[nx.MultiDiGraph]:
+        """
+        读取月度图，返回精简图（见 _strip_graph）；是否启用缓存、冷/热加载结果都一致。
+        """
+        stamp: Optional[Tuple[int, ...]] = None
+        if self.use_graph_cache:
+            try:
+                st = os.stat(graph_path)
+                stamp = (_GRAPH_CACHE_VERSION, st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            if stamp is not None:
+                graph = self._read_graph_cache(graph_path, stamp)
+                if graph is not None:
+                    return graph
         try:
-            return nx.read_graphml(graph_path)
+            graph = nx.read_graphml(graph_path)
         except Exception as e:
             logger.warning(f"加载图失败: {graph_path}, 错误: {e}")
             return None
+        graph = _strip_graph(graph)
+        if stamp is not None:
+            self._write_graph_cache(graph_path, stamp, graph)
+        return graph
 
     def _load_index(self) -> Dict[str, Any]:
         index_file = self.graphs_dir / "index.json"
@@ -397,8 +641,8 @@ class NewcomerAnalyzer:
                 continue
 
             # 只做一次
-            core_node_ids, _, _ = self.identify_core_members(graph)
             g_simple = _to_undirected_simple(graph)
+            core_node_ids = self._select_core_node_ids(graph, g_simple=g_simple)
             actor_nodes = [
                 n for n, a in graph.nodes(data=True)
                 if str(a.get("node_type", "Actor")) == "Actor"
@@ -411,15 +655,22 @@ class NewcomerAnalyzer:
                 g_simple=g_simple,
                 core_node_ids=core_node_ids,
                 actor_nodes=actor_nodes,
+                components=list(nx.connected_components(g_simple)),
             ))
         return prepared
 
     # ---------- 核心成员识别（沿用原算法） ----------
 
-    def identify_core_members(self, graph: nx.MultiDiGraph) -> Tuple[List[str], List[int], List[str]]:
+    def identify_core_members(
+        self,
+        graph: nx.MultiDiGraph,
+        g_simple: Optional[nx.Graph] = None,
+    ) -> Tuple[List[str], List[int], List[str]]:
         """
         返回：(core_node_ids, core_actor_ids, core_logins)
 
+        g_simple：可选，已构建好的无向简单图（见 _to_undirected_simple），用于 k-core 分解
+
         算法来自 burnout_analyzer.py：
         - k-core（无向）
         - score = 0.6*degree_norm + 0.4*kcore_norm
@@ -429,78 +680,75 @@ class NewcomerAnalyzer:
           * score < 平均分 且已有>=3 人则停止
         - 最少补到 2 人
         """
+        core_node_ids = self._select_core_node_ids(graph, g_simple)
+        core_actor_ids: List[int] = []
+        core_logins: List[str] = []
+        for node_id in core_node_ids:
+            node_attr = graph.nodes[node_id]
+            core_actor_ids.append(_parse_actor_id(node_attr.get("actor_id", 0)))
+            core_logins.append(str(node_attr.get("login", node_id)))
+        return core_node_ids, core_actor_ids, core_logins
+
+    def _select_core_node_ids(
+        self,
+        graph: nx.MultiDiGraph,
+        g_simple: Optional[nx.Graph] = None,
+    ) -> List[str]:
+        """identify_core_members 的选取部分：只返回 core_node_ids，不读取 login/actor_id。"""
         if graph.number_of_nodes() == 0:
-            return [], [], []
+            return []
 
-        degrees = dict(graph.degree())
-        if not degrees:
-            return [], [], []
+        nodes = list(graph.nodes())
+        total_actors = len(nodes)
+        deg = np.fromiter((d for _, d in graph.degree()), dtype=np.int64, count=total_actors)
 
-        degree_values = list(degrees.values())
-        degree_max = max(degree_values) if degree_values else 0
-        total_degree = sum(degree_values)
-        total_actors = len(degrees)
+        degree_max = int(deg.max())
+        total_degree = int(deg.sum())
 
         # k-core 分解
+        # nx.core_number 不接受多重图（to_undirected 后仍是 MultiGraph），沿用原有回退：全部记为 1。
+        # 直接判断，省去整图深拷贝后再抛异常；简单图只需拓扑，用无属性的无向图即可。
         try:
-            undirected = graph.to_undirected()
+            if graph.is_multigraph():
+                raise nx.NetworkXNotImplemented("not implemented for multigraph type")
+            undirected = g_simple if g_simple is not None else _to_undirected_simple(graph)
             core_numbers = nx.core_number(undirected)
             max_k = max(core_numbers.values()) if core_numbers else 0
         except Exception:
             core_numbers = {n: 1 for n in graph.nodes()}
             max_k = 1
 
-        actor_scores: Dict[str, Dict[str, float]] = {}
-        for node_id in graph.nodes():
-            deg = degrees.get(node_id, 0)
-            kcore = core_numbers.get(node_id, 0)
-            degree_norm = deg / max(degree_max, 1)
-            kcore_norm = kcore / max(max_k, 1)
-            score = 0.6 * degree_norm + 0.4 * kcore_norm
-            actor_scores[node_id] = {"score": score, "degree": deg, "kcore": kcore}
-
-        sorted_actors = sorted(actor_scores.items(), key=lambda x: x[1]["score"], reverse=True)
+        kcore = np.fromiter((core_numbers.get(n, 0) for n in nodes), dtype=np.int64, count=total_actors)
+        score = 0.6 * (deg / max(degree_max, 1)) + 0.4 * (kcore / max(max_k, 1))
+        # 稳定降序，与 sorted(..., reverse=True) 的并列次序一致
+        order = np.argsort(-score, kind="stable")
 
         contribution_threshold = total_degree * 0.7
         max_core_count = max(3, int(total_actors * 0.3))
-        avg_score = sum(s["score"] for s in actor_scores.values()) / len(actor_scores) if actor_scores else 0.0
-
-        core_node_ids: List[str] = []
-        core_actor_ids: List[int] = []
-        core_logins: List[str] = []
-
-        cumsum = 0.0
-        for node_id, sdata in sorted_actors:
-            should_stop = (
-                cumsum >= contribution_threshold
-                or len(core_node_ids) >= max_core_count
-                or (sdata["score"] < avg_score and len(core_node_ids) >= 3)
-            )
-            if should_stop:
-                continue
-
-            node_attr = graph.nodes[node_id]
-            login = node_attr.get("login", node_id)
-            actor_id = _parse_actor_id(node_attr.get("actor_id", 0))
-
-            core_node_ids.append(node_id)
-            core_actor_ids.append(actor_id)
-            core_logins.append(str(login))
-            cumsum += float(sdata.get("degree", 0))
+        # 按节点顺序逐个累加，保持与逐元素求和相同的舍入
+        avg_score = sum(score.tolist()) / total_actors
+
+        # 按分数降序选取，三重约束一旦触发便对后续所有节点成立，因此入选者是排序后的前缀
+        sorted_deg = deg[order]
+        cum_before = np.concatenate(([0], np.cumsum(sorted_deg)[:-1]))
+        rank = np.arange(total_actors)
+        stop = (
+            (cum_before >= contribution_threshold)
+            | (rank >= max_core_count)
+            | ((score[order] < avg_score) & (rank >= 3))
+        )
+        n_core = int(np.argmax(stop)) if stop.any() else total_actors
+        ordered_nodes = [nodes[i] for i in order.tolist()]
+
+        core_node_ids = ordered_nodes[:n_core]
 
         # 至少 2 个核心成员（补齐）
-        if len(core_node_ids) < 2 and len(sorted_actors) >= 2:
-            for node_id, _ in sorted_actors[:2]:
-                if node_id in core_node_ids:
-                    continue
-                node_attr = graph.nodes[node_id]
-                login = node_attr.get("login", node_id)
-                actor_id = _parse_actor_id(node_attr.get("actor_id", 0))
-                core_node_ids.append(node_id)
-                core_actor_ids.append(actor_id)
-                core_logins.append(str(login))
+        if len(core_node_ids) < 2 and total_actors >= 2:
+            for node_id in ordered_nodes[:2]:
+                if node_id not in core_node_ids:
+                    core_node_ids.append(node_id)
 
-        return core_node_ids, core_actor_ids, core_logins
+        return core_node_ids
 
     # ---------- 指标1：新人加入时到核心平均路径 ----------
 
@@ -517,7 +765,7 @@ class NewcomerAnalyzer:
         newcomer_records: List[NewcomerDistanceRecord] = []
         monthly_summary: List[Dict[str, Any]] = []
 
-        first_seen: Dict[str, str] = {}  # node_id -> first month
+        seen: Set[str] = set()  # 之前月份出现过的 actor
 
         for pm in prepared_months:
             month = pm.month
@@ -529,52 +777,50 @@ class NewcomerAnalyzer:
             g_simple = pm.g_simple
 
             newcomers_this_month: List[NewcomerDistanceRecord] = []
-            for node_id, attr in graph.nodes(data=True):
-                if str(attr.get("node_type", "Actor")) != "Actor":
-                    continue
-
-                if node_id not in first_seen:
-                    first_seen[node_id] = month
-
-                    newcomer_login = str(attr.get("login", node_id))
-                    newcomer_actor_id = _parse_actor_id(attr.get("actor_id", 0))
+            new_nodes = _new_in_order(pm.actor_nodes, seen)
+            seen.update(new_nodes)
 
-                    core_targets = [c for c in core_node_ids if c != node_id]
-                    total_core = len(core_targets)
+            distances = _distances_to_core(g_simple, new_nodes, core_node_ids, pm.components)
 
-                    if total_core == 0:
-                        rec = NewcomerDistanceRecord(
-                            repo_name=repo_name,
-                            join_month=month,
-                            newcomer_node_id=node_id,
-                            newcomer_actor_id=newcomer_actor_id,
-                            newcomer_login=newcomer_login,
-                            avg_shortest_path_to_core=None,
-                            reachable_core_count=0,
-                            total_core_count=0,
-                        )
-                        newcomer_records.append(rec)
-                        newcomers_this_month.append(rec)
-                        continue
+            for node_id in new_nodes:
+                attr = graph.nodes[node_id]
+                newcomer_login = str(attr.get("login", node_id))
+                newcomer_actor_id = _parse_actor_id(attr.get("actor_id", 0))
 
-                    lengths = nx.single_source_shortest_path_length(g_simple, node_id)
-                    reachable = [lengths[t] for t in core_targets if t in lengths]
-                    reachable_count = len(reachable)
-
-                    avg_len: Optional[float] = None if reachable_count == 0 else round(sum(reachable) / reachable_count, 4)
+                total_core = sum(1 for c in core_node_ids if c != node_id)
 
+                if total_core == 0:
                     rec = NewcomerDistanceRecord(
                         repo_name=repo_name,
                         join_month=month,
                         newcomer_node_id=node_id,
                         newcomer_actor_id=newcomer_actor_id,
                         newcomer_login=newcomer_login,
-                        avg_shortest_path_to_core=avg_len,
-                        reachable_core_count=reachable_count,
-                        total_core_count=total_core,
+                        avg_shortest_path_to_core=None,
+                        reachable_core_count=0,
+                        total_core_count=0,
                     )
                     newcomer_records.append(rec)
                     newcomers_this_month.append(rec)
+                    continue
+
+                reachable = distances[node_id]
+                reachable_count = len(reachable)
+
+                avg_len: Optional[float] = None if reachable_count == 0 else round(sum(reachable) / reachable_count, 4)
+
+                rec = NewcomerDistanceRecord(
+                    repo_name=repo_name,
+                    join_month=month,
+                    newcomer_node_id=node_id,
+                    newcomer_actor_id=newcomer_actor_id,
+                    newcomer_login=newcomer_login,
+                    avg_shortest_path_to_core=avg_len,
+                    reachable_core_count=reachable_count,
+                    total_core_count=total_core,
+                )
+                newcomer_records.append(rec)
+                newcomers_this_month.append(rec)
 
             vals = [r.avg_shortest_path_to_core for r in newcomers_this_month if r.avg_shortest_path_to_core is not None]
             month_avg = round(sum(vals) / len(vals), 4) if vals else None
@@ -620,13 +866,10 @@ class NewcomerAnalyzer:
             if graph is None or graph.number_of_nodes() == 0:
                 continue
 
-            for node_id, attr in graph.nodes(data=True):
-                if str(attr.get("node_type", "Actor")) != "Actor":
-                    continue
-                if node_id not in first_seen:
-                    first_seen[node_id] = month
-                if node_id not in actor_info:
-                    actor_info[node_id] = (_parse_actor_id(attr.get("actor_id", 0)), str(attr.get("login", node_id)))
+            for node_id in _new_in_order(pm.actor_nodes, first_seen.keys()):
+                attr = graph.nodes[node_id]
+                first_seen[node_id] = month
+                actor_info[node_id] = (_parse_actor_id(attr.get("actor_id", 0)), str(attr.get("login", node_id)))
 
             core_node_ids = pm.core_node_ids
             for c in core_node_ids:
@@ -743,18 +986,9 @@ class NewcomerAnalyzer:
 
             non_core_nodes = [n for n in actor_nodes if n not in core_set]
 
-            unreach_all = 0
-            unreach_any = 0
-
-            for node_id in non_core_nodes:
-                lengths = nx.single_source_shortest_path_length(g_simple, node_id)
-                reachable_core = sum(1 for c in core_targets if c in lengths)
-
-                if reachable_core == 0:
-                    unreach_all += 1
-                    unreach_any += 1
-                elif reachable_core < total_core:
-                    unreach_any += 1
+            unreach_all, unreach_any = _count_unreachable_to_core(
+                g_simple, core_targets, non_core_nodes, pm.components
+            )
 
             monthly.append(CoreReachabilityMonthlySummary(
                 repo_name=repo_name,
@@ -783,140 +1017,242 @@ class NewcomerAnalyzer:
 
     # ---------- 总流程 ----------
 
-    def analyze_all_repos(self) -> Dict[str, Any]:
+    def _collect_repo_tasks(self) -> List[Tuple[str, Dict[str, str]]]:
+        """读取索引，返回 [(repo_name, {month: actor-actor 图路径})]，保持索引顺序。"""
         index = self._load_index()
         if not index:
-            return {}
+            return []
 
         total_repos = len(index)
         logger.info(f"开始分析 {total_repos} 个项目（newcomer/core 指标）...")
 
+        tasks: List[Tuple[str, Dict[str, str]]] = []
+        for repo_name, graph_types_data in index.items():
+            months = self._get_actor_actor_months(graph_types_data)
+            if months:
+                tasks.append((repo_name, months))
+        return tasks
+
+    def _iter_repo_results(
+        self,
+        tasks: List[Tuple[str, Dict[str, str]]],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """逐个产出 (repo_name, 分析结果)；单进程按索引顺序，多进程按完成顺序。"""
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        workers = max(1, min(workers, len(tasks)))
+
+        # 单进程模式（便于调试）
+        if workers == 1:
+            for repo_idx, (repo_name, months) in enumerate(tasks, 1):
+                logger.info(f"[{repo_idx}/{len(tasks)}] 分析: {repo_name} ({len(months)} 个月)")
+                repo_result = self._analyze_single_repo(repo_name, months)
+                if repo_result is not None:
+                    yield repo_name, repo_result
+            return
+
+        logger.info(f"使用 {workers} 个工作进程进行并行分析")
+        task_args = [
+            (str(self.graphs_dir), str(self.output_dir), self.use_graph_cache, repo_name, months)
+            for repo_name, months in tasks
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_analyze_repo_worker, args): args[3] for args in task_args}
+            for done_idx, future in enumerate(as_completed(futures), 1):
+                repo_name = futures[future]
+                try:
+                    _, repo_result = future.result()
+                except Exception as e:
+                    # 与单进程模式一致：任一项目失败即中止，避免写出缺项目的结果
+                    logger.error(f"分析项目失败: {repo_name}, 错误: {e}")
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                logger.info(f"[{done_idx}/{len(tasks)}] 完成: {repo_name}")
+                if repo_result is not None:
+                    yield repo_name, repo_result
+
+    def analyze_all_repos(self) -> Dict[str, Any]:
+        tasks = self._collect_repo_tasks()
+        collected = dict(self._iter_repo_results(tasks))
+
+        # 按索引顺序输出，与单进程结果一致
         results: Dict[str, Any] = {}
+        for repo_name, _ in tasks:
+            if repo_name in collected:
+                results[repo_name] = collected[repo_name]
+        return results
 
-        for repo_idx, (repo_name, graph_types_data) in enumerate(index.items(), 1):
-            months = self._get_actor_actor_months(graph_types_data)
-            if not months:
-                continue
+    def analyze_all_repos_streaming(self) -> Dict[str, Dict[str, Any]]:
+        """
+        流式分析：每个项目完成后立即追加写入 per_repo.jsonl，内存中只保留摘要行；
+        全部完成后按索引顺序从 jsonl 拼出 full_analysis.json（内容与非流式一致）。
 
-            logger.info(f"[{repo_idx}/{total_repos}] 分析: {repo_name} ({len(months)} 个月)")
+        返回 {repo_name: 摘要行}（索引顺序）。
+        """
+        tasks = self._collect_repo_tasks()
+        jsonl_file = self.output_dir / "per_repo.jsonl"
+        offsets: Dict[str, Tuple[int, int]] = {}
+        rows: Dict[str, Dict[str, Any]] = {}
+
+        with open(jsonl_file, "wb") as f:
+            for repo_name, repo_result in self._iter_repo_results(tasks):
+                line = _dumps_json(repo_result, indent=False)
+                offsets[repo_name] = (f.tell(), len(line))
+                f.write(line + b"\n")
+                rows[repo_name] = self._summary_row(repo_name, repo_result)
+        logger.info(f"逐项目结果已保存: {jsonl_file}")
+
+        ordered = [repo_name for repo_name, _ in tasks if repo_name in offsets]
+        if ordered:
+            self._write_full_analysis_from_jsonl(jsonl_file, ordered, offsets)
+        return {repo_name: rows[repo_name] for repo_name in ordered}
+
+    def _write_full_analysis_from_jsonl(
+        self,
+        jsonl_file: Path,
+        repo_names: List[str],
+        offsets: Dict[str, Tuple[int, int]],
+    ) -> None:
+        """按 repo_names（非空）顺序逐个读取 jsonl 中的项目结果，拼成与 json.dump(indent=2) 相同格式的 full_analysis.json。"""
+        full_result_file = self.output_dir / "full_analysis.json"
+        with open(jsonl_file, "rb") as src, open(full_result_file, "wb") as out:
+            out.write(b"{")
+            for i, repo_name in enumerate(repo_names):
+                offset, length = offsets[repo_name]
+                src.seek(offset)
+                repo_result = _loads_json(src.read(length))
+                out.write(b",\n  " if i else b"\n  ")
+                out.write(_dumps_json(repo_name))
+                out.write(b": ")
+                out.write(_dumps_json(repo_result).replace(b"\n", b"\n  "))
+            out.write(b"\n}")
+        logger.info(f"完整分析结果已保存: {full_result_file}")
 
-            prepared_months = self.prepare_monthly_data(repo_name, months)
-            if not prepared_months:
-                continue
+    def _analyze_single_repo(self, repo_name: str, months: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """分析单个项目的三类指标，无有效月份时返回 None。"""
+        prepared_months = self.prepare_monthly_data(repo_name, months)
+        if not prepared_months:
+            return None
 
-            newcomer_records, newcomer_monthly = self.compute_newcomer_distances_for_repo(repo_name, prepared_months)
-            periphery_records, avg_months_to_core, p2c_monthly = self.compute_periphery_to_core_for_repo(repo_name, prepared_months)
-            reach_monthly, reach_overall = self.compute_core_reachability_for_repo(repo_name, prepared_months)
+        newcomer_records, newcomer_monthly = self.compute_newcomer_distances_for_repo(repo_name, prepared_months)
+        periphery_records, avg_months_to_core, p2c_monthly = self.compute_periphery_to_core_for_repo(repo_name, prepared_months)
+        reach_monthly, reach_overall = self.compute_core_reachability_for_repo(repo_name, prepared_months)
 
 
-            # overall newcomer avg（只对有值的）
-            newcomer_vals = [r.avg_shortest_path_to_core for r in newcomer_records if r.avg_shortest_path_to_core is not None]
-            overall_newcomer_avg = round(sum(newcomer_vals) / len(newcomer_vals), 4) if newcomer_vals else None
+        # overall newcomer avg（只对有值的）
+        newcomer_vals = [r.avg_shortest_path_to_core for r in newcomer_records if r.avg_shortest_path_to_core is not None]
+        overall_newcomer_avg = round(sum(newcomer_vals) / len(newcomer_vals), 4) if newcomer_vals else None
 
-            # ===== 三层分析：三个指标都是“越小越好” => increase_is_bad=True =====
-            newcomer_series = [m.get("avg_shortest_path_to_core") for m in newcomer_monthly]
-            newcomer_three_layer = compute_three_layer_analysis(newcomer_series, max_score=25.0, increase_is_bad=True)
+        # ===== 三层分析：三个指标都是“越小越好” => increase_is_bad=True =====
+        newcomer_series = [m.get("avg_shortest_path_to_core") for m in newcomer_monthly]
+        newcomer_three_layer = compute_three_layer_analysis(newcomer_series, max_score=25.0, increase_is_bad=True)
 
-            reach_monthly_dicts = [m.to_dict() for m in reach_monthly]
-            unreach_all_series = [m.get("unreachable_to_all_core_rate") for m in reach_monthly_dicts]
-            unreach_any_series = [m.get("unreachable_to_any_core_rate") for m in reach_monthly_dicts]
-            unreach_all_three_layer = compute_three_layer_analysis(unreach_all_series, max_score=25.0, increase_is_bad=True)
-            unreach_any_three_layer = compute_three_layer_analysis(unreach_any_series, max_score=25.0, increase_is_bad=True)
+        reach_monthly_dicts = [m.to_dict() for m in reach_monthly]
+        unreach_all_series = [m.get("unreachable_to_all_core_rate") for m in reach_monthly_dicts]
+        unreach_any_series = [m.get("unreachable_to_any_core_rate") for m in reach_monthly_dicts]
+        unreach_all_three_layer = compute_three_layer_analysis(unreach_all_series, max_score=25.0, increase_is_bad=True)
+        unreach_any_three_layer = compute_three_layer_analysis(unreach_any_series, max_score=25.0, increase_is_bad=True)
 
-            p2c_series = [m.get("avg_months_to_core") for m in p2c_monthly]
-            p2c_three_layer = compute_three_layer_analysis(p2c_series, max_score=25.0, increase_is_bad=True)
+        p2c_series = [m.get("avg_months_to_core") for m in p2c_monthly]
+        p2c_three_layer = compute_three_layer_analysis(p2c_series, max_score=25.0, increase_is_bad=True)
 
-            results[repo_name] = {
-                "repo_name": repo_name,
-                "graph_type_used": "actor-actor",
-                "three_layer_analysis": {
-                    "newcomer_distance": newcomer_three_layer,
-                    "periphery_to_core_monthly": p2c_three_layer,
-                    "unreachable_to_all_core_rate": unreach_all_three_layer,
-                    "unreachable_to_any_core_rate": unreach_any_three_layer,
-                },
-                "newcomer_distance": {
-                    "overall_avg_shortest_path_to_core": overall_newcomer_avg,
-                    "records": [r.to_dict() for r in newcomer_records],
-                    "monthly_summary": newcomer_monthly,
-                },
-                "periphery_to_core": {
-                    "average_months_to_core": avg_months_to_core,
-                    "records": [r.to_dict() for r in periphery_records],
-                    "monthly_summary": p2c_monthly,
-                },
-                "core_reachability": {
-                    "overall": reach_overall,
-                    "monthly_summary": [m.to_dict() for m in reach_monthly],
-                },
-            }
+        return {
+            "repo_name": repo_name,
+            "graph_type_used": "actor-actor",
+            "three_layer_analysis": {
+                "newcomer_distance": newcomer_three_layer,
+                "periphery_to_core_monthly": p2c_three_layer,
+                "unreachable_to_all_core_rate": unreach_all_three_layer,
+                "unreachable_to_any_core_rate": unreach_any_three_layer,
+            },
+            "newcomer_distance": {
+                "overall_avg_shortest_path_to_core": overall_newcomer_avg,
+                "records": [r.to_dict() for r in newcomer_records],
+                "monthly_summary": newcomer_monthly,
+            },
+            "periphery_to_core": {
+                "average_months_to_core": avg_months_to_core,
+                "records": [r.to_dict() for r in periphery_records],
+                "monthly_summary": p2c_monthly,
+            },
+            "core_reachability": {
+                "overall": reach_overall,
+                "monthly_summary": reach_monthly_dicts,
+            },
+        }
 
-        return results
+
+    def _summary_row(self, repo_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """单个项目的摘要行（summary.json 中的一项）"""
+        newcomer = data.get("newcomer_distance", {}) or {}
+        p2c = data.get("periphery_to_core", {}) or {}
+        reach = data.get("core_reachability", {}) or {}
+        three = data.get("three_layer_analysis", {}) or {}
+
+        reach_overall = reach.get("overall", {}) or {}
+
+        # 计算风险分
+        risk_scores = [
+            (three.get("newcomer_distance", {}) or {}).get("total_score", 0),
+            (three.get("periphery_to_core_monthly", {}) or {}).get("total_score", 0),
+            (three.get("unreachable_to_all_core_rate", {}) or {}).get("total_score", 0),
+            (three.get("unreachable_to_any_core_rate", {}) or {}).get("total_score", 0),
+        ]
+        total_risk = sum(risk_scores)
+
+        # 计算健康分 (100 - 风险分), 越高越好
+        health_score = max(0.0, 100.0 - total_risk)
+
+        return {
+            "repo_name": repo_name,
+            "overall_avg_shortest_path_to_core": newcomer.get("overall_avg_shortest_path_to_core"),
+            "newcomer_count": len(newcomer.get("records", []) or []),
+            "newcomer_with_reachable_core_count": sum(
+                1 for r in (newcomer.get("records", []) or []) if r.get("avg_shortest_path_to_core") is not None
+            ),
+            "average_months_to_core": p2c.get("average_months_to_core"),
+            "core_member_count_ever": len(p2c.get("records", []) or []),
+            "overall_unreachable_to_all_core_rate": reach_overall.get("overall_unreachable_to_all_core_rate"),
+            "overall_unreachable_to_any_core_rate": reach_overall.get("overall_unreachable_to_any_core_rate"),
+
+            "three_layer_newcomer_distance_score": risk_scores[0],
+            "three_layer_periphery_to_core_monthly_score": risk_scores[1],
+            "three_layer_unreachable_to_all_core_rate_score": risk_scores[2],
+            "three_layer_unreachable_to_any_core_rate_score": risk_scores[3],
+
+            "total_risk_score": total_risk,
+            "health_score": health_score  # 新增健康分
+        }
 
     def save_results(self, results: Dict[str, Any]) -> None:
         full_result_file = self.output_dir / "full_analysis.json"
-        with open(full_result_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        _write_json(results, full_result_file)
         logger.info(f"完整分析结果已保存: {full_result_file}")
 
-        summary: List[Dict[str, Any]] = []
-        for repo_name, data in results.items():
-            newcomer = data.get("newcomer_distance", {}) or {}
-            p2c = data.get("periphery_to_core", {}) or {}
-            reach = data.get("core_reachability", {}) or {}
-            three = data.get("three_layer_analysis", {}) or {}
-
-            reach_overall = reach.get("overall", {}) or {}
-            
-            # 计算风险分
-            risk_scores = [
-                (three.get("newcomer_distance", {}) or {}).get("total_score", 0),
-                (three.get("periphery_to_core_monthly", {}) or {}).get("total_score", 0),
-                (three.get("unreachable_to_all_core_rate", {}) or {}).get("total_score", 0),
-                (three.get("unreachable_to_any_core_rate", {}) or {}).get("total_score", 0),
-            ]
-            total_risk = sum(risk_scores)
-            
-            # 计算健康分 (100 - 风险分), 越高越好
-            health_score = max(0.0, 100.0 - total_risk)
-
-            summary.append({
-                "repo_name": repo_name,
-                "overall_avg_shortest_path_to_core": newcomer.get("overall_avg_shortest_path_to_core"),
-                "newcomer_count": len(newcomer.get("records", []) or []),
-                "newcomer_with_reachable_core_count": sum(
-                    1 for r in (newcomer.get("records", []) or []) if r.get("avg_shortest_path_to_core") is not None
-                ),
-                "average_months_to_core": p2c.get("average_months_to_core"),
-                "core_member_count_ever": len(p2c.get("records", []) or []),
-                "overall_unreachable_to_all_core_rate": reach_overall.get("overall_unreachable_to_all_core_rate"),
-                "overall_unreachable_to_any_core_rate": reach_overall.get("overall_unreachable_to_any_core_rate"),
-
-                "three_layer_newcomer_distance_score": risk_scores[0],
-                "three_layer_periphery_to_core_monthly_score": risk_scores[1],
-                "three_layer_unreachable_to_all_core_rate_score": risk_scores[2],
-                "three_layer_unreachable_to_any_core_rate_score": risk_scores[3],
-                
-                "total_risk_score": total_risk,
-                "health_score": health_score  # 新增健康分
-            })
+        self.save_summary([self._summary_row(repo_name, data) for repo_name, data in results.items()])
 
+    def save_summary(self, summary: List[Dict[str, Any]]) -> None:
         # 排序：按健康分从高到低
         summary.sort(key=lambda x: x["health_score"], reverse=True)
 
         summary_file = self.output_dir / "summary.json"
-        with open(summary_file, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+        _write_json(summary, summary_file)
         logger.info(f"摘要已保存: {summary_file}")
 
     def run(self) -> Dict[str, Any]:
+        """执行分析并保存结果；stream_results=True 时返回 {repo_name: 摘要行} 而不是完整结果。"""
         logger.info("=" * 60)
         logger.info("开始 Newcomer / Core-evolution 分析 (v4)")
         logger.info("=" * 60)
 
-        results = self.analyze_all_repos()
-        if results:
-            self.save_results(results)
+        if self.stream_results:
+            results = self.analyze_all_repos_streaming()
+            if results:
+                self.save_summary(list(results.values()))
+        else:
+            results = self.analyze_all_repos()
+            if results:
+                self.save_results(results)
 
         logger.info("=" * 60)
         logger.info("分析完成!")
@@ -932,11 +1268,30 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Newcomer / Core-evolution 分析 (v4)")
     parser.add_argument("--graphs-dir", type=str, default="output/monthly-graphs/", help="月度图目录")
     parser.add_argument("--output-dir", type=str, default="output/newcomer-analysis/", help="输出目录")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="并行工作进程数（默认使用 CPU 核心数，1 表示单进程）",
+    )
+    parser.add_argument(
+        "--stream-results",
+        action="store_true",
+        help="逐项目写入 per_repo.jsonl 并从中拼出 full_analysis.json，内存只保留摘要",
+    )
+    parser.add_argument(
+        "--no-graph-cache",
+        action="store_true",
+        help="不使用/不写入解析后的图缓存（<output-dir>/_graph_cache），每次都重新解析 GraphML",
+    )
 
     args = parser.parse_args()
 
     analyzer = NewcomerAnalyzer(
         graphs_dir=args.graphs_dir,
         output_dir=args.output_dir,
+        use_graph_cache=not args.no_graph_cache,
+        workers=args.workers,
+        stream_results=args.stream_results,
     )
     analyzer.run()
@@ -11,21 +11,52 @@ Newcomer / Core-evolution 详细报告生成器（优化版）
 用法示例：
 python -m src.analysis.newcomer_detailed_report_optimized --top 10
 python -m src.analysis.newcomer_detailed_report_optimized --repo "kubernetes/kubernetes"
+
+输入既可以是 full_analysis.json，也可以是 newcomer_analyzer --stream-results 产出的 per_repo.jsonl。
+安装了 ijson 时按项目流式解析 full_analysis.json，不必把整个文件读入内存。
 """
 
+import csv
 import json
 import argparse
+import heapq
+import itertools
+import time
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # -----------------------------
 # Format helpers
 # -----------------------------
+# 预先绑定常用精度的格式化方法，避免每次调用都解析运行时拼出的格式串
+_FLOAT_FMT = {n: ("{:.%df}" % n).format for n in range(8)}
+_PCT_FMT = {n: ("{:.%df}%%" % n).format for n in range(8)}
+# 月度趋势表的行模板（位置参数：月份、新人数、新人步长、新晋核、晋核耗时、all/any 不可达）
+_MONTHLY_ROW = "   {:<16} {:<10} {:<10} {:<10} {:<12} {:<12} {:<12}".format
+
+
 def _fmt(v: Any, default: str = "N/A", ndigits: int = 4) -> str:
     if v is None:
         return default
+    t = type(v)
+    if t is int:
+        return str(v)
+    if t is float:
+        fmt = _FLOAT_FMT.get(ndigits)
+        return fmt(v) if fmt is not None else f"{v:.{ndigits}f}"
+    # json/ijson 只产出精确的 int/float；其余子类型（bool 等）沿用原判断
     if isinstance(v, int):
         return str(v)
     if isinstance(v, float):
@@ -36,29 +67,39 @@ def _fmt(v: Any, default: str = "N/A", ndigits: int = 4) -> str:
 def _fmt_pct(v: Any, default: str = "N/A", ndigits: int = 2) -> str:
     if v is None:
         return default
-    try:
-        return f"{float(v) * 100:.{ndigits}f}%"
-    except Exception:
-        return default
+    t = type(v)
+    if t is float or t is int:
+        pct = v * 100.0
+    else:
+        # 其余输入（数字字符串、bool 等）沿用 float() 转换，失败时返回默认值
+        try:
+            pct = float(v) * 100
+        except Exception:
+            return default
+    fmt = _PCT_FMT.get(ndigits)
+    return fmt(pct) if fmt is not None else f"{pct:.{ndigits}f}%"
 
 
 # -----------------------------
 # Scoring & warning level
 # -----------------------------
-_THREE_LAYER_KEYS = [
+_THREE_LAYER_KEYS = (
     "newcomer_distance",
     "periphery_to_core_monthly",
     "unreachable_to_all_core_rate",
     "unreachable_to_any_core_rate",
-]
+)
+
+# 缺失字段的只读占位，避免每次 `.get(k, {}) or {}` 都新建空 dict（不要修改它）
+_EMPTY: Dict[str, Any] = {}
 
 
 def compute_total_score(repo_data: Dict[str, Any]) -> float:
     """四个三层分析 total_score 之和（缺失项按 0 计）。"""
-    three = repo_data.get("three_layer_analysis", {}) or {}
+    three = repo_data.get("three_layer_analysis") or _EMPTY
     total = 0.0
     for k in _THREE_LAYER_KEYS:
-        total += float((three.get(k, {}) or {}).get("total_score") or 0.0)
+        total += float((three.get(k) or _EMPTY).get("total_score") or 0.0)
     return total
 
 
@@ -74,23 +115,24 @@ def warning_level(total_score: float) -> Tuple[str, str]:
     return "🟢", "healthy"
 
 
+# 与 _THREE_LAYER_KEYS 一一对应的问题说明（可达性两项给出同一类解释并标明口径）
+_FLAG_EXPLANATIONS = (
+    "新人和核心贡献者联系不够紧密",
+    "新人需要较长时间才能成为核心",
+    "新人和核心贡献者之间可达性断裂（与所有 core 不可达）",
+    "新人和核心贡献者之间可达性断裂（与至少一个 core 不可达）",
+)
+
+
 def flagged_issues(repo_data: Dict[str, Any], threshold: float = 15.0) -> List[Tuple[str, float, str]]:
     """返回单项 total_score > threshold 的问题说明列表：[(key, score, message), ...]."""
-    three = repo_data.get("three_layer_analysis", {}) or {}
-
-    explanations = {
-        "newcomer_distance": "新人和核心贡献者联系不够紧密",
-        "periphery_to_core_monthly": "新人需要较长时间才能成为核心",
-        # 对可达性两项，给出同一类解释并标明口径
-        "unreachable_to_all_core_rate": "新人和核心贡献者之间可达性断裂（与所有 core 不可达）",
-        "unreachable_to_any_core_rate": "新人和核心贡献者之间可达性断裂（与至少一个 core 不可达）",
-    }
+    three = repo_data.get("three_layer_analysis") or _EMPTY
 
     out: List[Tuple[str, float, str]] = []
-    for k in _THREE_LAYER_KEYS:
-        score = float((three.get(k, {}) or {}).get("total_score") or 0.0)
+    for k, explanation in zip(_THREE_LAYER_KEYS, _FLAG_EXPLANATIONS):
+        score = float((three.get(k) or _EMPTY).get("total_score") or 0.0)
         if score > threshold:
-            out.append((k, score, explanations.get(k, k)))
+            out.append((k, score, explanation))
     # 按严重程度从高到低
     out.sort(key=lambda x: x[1], reverse=True)
     return out
@@ -99,49 +141,64 @@ def flagged_issues(repo_data: Dict[str, Any], threshold: float = 15.0) -> List[T
 # -----------------------------
 # Report blocks
 # -----------------------------
-def _fmt_score_block(name: str, three_layer: Dict[str, Any]) -> List[str]:
-    lines: List[str] = []
-    if not three_layer:
-        lines.append(f"   ⚪ {name}: 无三层分析数据")
-        return lines
-
-    n_points = three_layer.get("n_points", 0)
-    total = three_layer.get("total_score", 0.0)
-
-    trend = three_layer.get("trend", {})
-    recent = three_layer.get("recent", {})
-    stability = three_layer.get("stability", {})
-
-    lines.append(f"   【{name}】")
-    lines.append(f"      数据点数: {n_points}")
-    lines.append(f"      三层总分: {_fmt(total, ndigits=4)} / 25")
-    lines.append(
-        f"      📉 长期趋势: slope={_fmt(trend.get('slope'), ndigits=6)}  score={_fmt(trend.get('score'), ndigits=4)}"
-    )
-    lines.append(
-        f"      📅 近期状态: early_avg={_fmt(recent.get('early_avg'))}  recent_avg={_fmt(recent.get('recent_avg'))}  "
-        f"change={_fmt(recent.get('change'), ndigits=6)}  score={_fmt(recent.get('score'), ndigits=4)}"
-    )
-    lines.append(
-        f"      📊 稳定性: volatility={_fmt(stability.get('volatility'), ndigits=6)}  "
-        f"threshold={_fmt(stability.get('threshold'), ndigits=3)}  score={_fmt(stability.get('score'), ndigits=4)}"
-    )
-    return lines
+# 与 _THREE_LAYER_KEYS 一一对应的三层分析小节标题
+_THREE_LAYER_TITLES = (
+    "新人到核心平均步长",
+    "晋升核心耗时",
+    "与所有 Core 不可达比例",
+    "与任一 Core 不可达比例",
+)
+
+# 与 _THREE_LAYER_KEYS 一一对应的异常说明
+_ABNORMALITY_DESCS = (
+    "新人需要较长时间才能成为核心(距离远)",
+    "新人晋升核心耗时变长",
+    "新人无法接触任何核心成员(完全断裂)",
+    "新人难以接触部分核心成员(部分断裂)",
+)
+
+
+class ScoreBundle(NamedTuple):
+    """单个项目的评分结果：排名时算一次，生成报告时直接复用"""
+
+    nd: float  # newcomer_distance 风险扣分
+    p2c: float  # periphery_to_core_monthly 风险扣分
+    all_ur: float  # unreachable_to_all_core_rate 风险扣分
+    any_ur: float  # unreachable_to_any_core_rate 风险扣分
+    total: float  # 四项扣分之和
+    health: float  # 健康分 max(0, 100 - total)
+    level: str  # 预警等级：low / medium / high
+
+    @property
+    def subscores(self) -> Tuple[float, float, float, float]:
+        """按 _THREE_LAYER_KEYS 顺序的四项扣分"""
+        return self[:4]
+
+
+def compute_score_bundle(repo_data: Dict[str, Any]) -> ScoreBundle:
+    """一次性读取四项 total_score，算出总扣分、健康分和预警等级"""
+    three = repo_data.get("three_layer_analysis") or _EMPTY
+    subscores = [(three.get(k) or _EMPTY).get("total_score", 0) for k in _THREE_LAYER_KEYS]
+    total = sum(subscores)
+    health = max(0.0, 100.0 - total)
+    if health < 60:
+        level = "high"
+    elif health < 80:
+        level = "medium"
+    else:
+        level = "low"
+    return ScoreBundle(*subscores, total, health, level)
 
 
 def _compute_health_score(repo_data: Dict[str, Any]) -> float:
     """计算健康分 (100 - total_risk)"""
-    three = repo_data.get("three_layer_analysis", {}) or {}
-    risk_scores = [
-        (three.get("newcomer_distance", {}) or {}).get("total_score", 0),
-        (three.get("periphery_to_core_monthly", {}) or {}).get("total_score", 0),
-        (three.get("unreachable_to_all_core_rate", {}) or {}).get("total_score", 0),
-        (three.get("unreachable_to_any_core_rate", {}) or {}).get("total_score", 0),
-    ]
-    return max(0.0, 100.0 - sum(risk_scores))
+    return compute_score_bundle(repo_data).health
 
 
-def generate_summary_table(repos_ranked: List[Tuple[str, float]], all_data: Dict[str, Any]) -> str:
+def generate_summary_table(
+    repos_ranked: List[Tuple[str, float]],
+    all_data: Optional[Dict[str, Any]] = None,
+) -> str:
     """生成汇总排名表"""
     lines = []
     lines.append("-" * 90)
@@ -158,25 +215,51 @@ def generate_summary_table(repos_ranked: List[Tuple[str, float]], all_data: Dict
     return "\n".join(lines)
 
 
-def generate_repo_report(repo_name: str, repo_data: Dict[str, Any]) -> str:
-    """生成单个项目的详细报告"""
-    # 提取数据
-    newcomer = repo_data.get("newcomer_distance", {}) or {}
-    p2c = repo_data.get("periphery_to_core", {}) or {}
-    reach = repo_data.get("core_reachability", {}) or {}
-    three = repo_data.get("three_layer_analysis", {}) or {}
+def _is_month_sorted(rows: List[Dict[str, Any]]) -> bool:
+    return all(a["month"] <= b["month"] for a, b in zip(rows, rows[1:]))
+
 
-    reach_overall = reach.get("overall", {}) or {}
+def _merge_monthly(
+    *sources: List[Dict[str, Any]],
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    按月份升序合并多个 monthly_summary，逐月产出 (month, 各来源当月记录...)，缺失记为 {}；
+    同一来源同月多条时取最后一条（与 {m["month"]: m} 建表一致）。
 
-    # 计算分数
-    health_score = _compute_health_score(repo_data)
+    analyzer 输出已按月份有序，此时用 heapq.merge 一次线性归并；否则回退为建表 + 排序。
+    """
+    if all(_is_month_sorted(rows) for rows in sources):
+        tagged = [zip((m["month"] for m in rows), itertools.repeat(tag), rows) for tag, rows in enumerate(sources)]
+        for month, group in itertools.groupby(heapq.merge(*tagged, key=lambda x: x[0]), key=lambda x: x[0]):
+            row: List[Dict[str, Any]] = [_EMPTY] * len(sources)
+            for _, tag, m in group:
+                row[tag] = m
+            yield (month, *row)
+        return
 
-    # 预警等级
-    warning_level = "low"
-    if health_score < 60:
-        warning_level = "high"
-    elif health_score < 80:
-        warning_level = "medium"
+    maps = [{m["month"]: m for m in rows} for rows in sources]
+    for month in sorted(set().union(*maps)):
+        yield (month, *(mp.get(month, _EMPTY) for mp in maps))
+
+
+def generate_repo_report(
+    repo_name: str,
+    repo_data: Dict[str, Any],
+    bundle: Optional[ScoreBundle] = None,
+) -> str:
+    """生成单个项目的详细报告；bundle 为排名阶段已算好的评分（未提供时现算）"""
+    # 提取数据
+    newcomer = repo_data.get("newcomer_distance") or _EMPTY
+    p2c = repo_data.get("periphery_to_core") or _EMPTY
+    reach = repo_data.get("core_reachability") or _EMPTY
+    three = repo_data.get("three_layer_analysis") or _EMPTY
+
+    reach_overall = reach.get("overall") or _EMPTY
+
+    # 分数与预警等级
+    if bundle is None:
+        bundle = compute_score_bundle(repo_data)
+    health_score = bundle.health
 
     level_icons = {
         "low": "🟢 优秀 (Low Risk)",
@@ -189,19 +272,11 @@ def generate_repo_report(repo_name: str, repo_data: Dict[str, Any]) -> str:
     lines.append(f"📊 项目: {repo_name}")
     lines.append("=" * 90)
     lines.append(f"⭐ 新人友好度健康分: {health_score:.4f} / 100")
-    lines.append(f"   等级: {level_icons.get(warning_level)}")
+    lines.append(f"   等级: {level_icons.get(bundle.level)}")
 
     # 异常说明 (Risk > 10)
     abnormalities = []
-    keys_map = {
-        "newcomer_distance": "新人需要较长时间才能成为核心(距离远)",
-        "periphery_to_core_monthly": "新人晋升核心耗时变长",
-        "unreachable_to_all_core_rate": "新人无法接触任何核心成员(完全断裂)",
-        "unreachable_to_any_core_rate": "新人难以接触部分核心成员(部分断裂)"
-    }
-
-    for key, desc in keys_map.items():
-        score = (three.get(key, {}) or {}).get("total_score", 0)
+    for desc, score in zip(_ABNORMALITY_DESCS, bundle.subscores):
         if score > 10:
              abnormalities.append(f"   - {desc} (风险扣分: {score:.4f})")
              
@@ -223,13 +298,13 @@ def generate_repo_report(repo_name: str, repo_data: Dict[str, Any]) -> str:
     lines.append("📈 三层分析详情 (Trend / Recent / Stability) - 扣分制(分数越低越好)")
     lines.append("-" * 90)
 
-    def _print_three(title, key):
-        tdata = three.get(key, {}) or {}
+    for key, title in zip(_THREE_LAYER_KEYS, _THREE_LAYER_TITLES):
+        tdata = three.get(key) or _EMPTY
         n = tdata.get("n_points", 0)
         total = tdata.get("total_score", 0.0)
-        trend = tdata.get("trend", {})
-        recent = tdata.get("recent", {})
-        stability = tdata.get("stability", {})
+        trend = tdata.get("trend", _EMPTY)
+        recent = tdata.get("recent", _EMPTY)
+        stability = tdata.get("stability", _EMPTY)
 
         lines.append(f"   【{title}】")
         lines.append(f"      数据点数: {n}")
@@ -253,11 +328,6 @@ def generate_repo_report(repo_name: str, repo_data: Dict[str, Any]) -> str:
         s_score = stability.get("score", 0)
         lines.append(f"      📊 稳定性: volatility={vol:.6f}  score={s_score:.4f}")
 
-    _print_three("新人到核心平均步长", "newcomer_distance")
-    _print_three("晋升核心耗时", "periphery_to_core_monthly")
-    _print_three("与所有 Core 不可达比例", "unreachable_to_all_core_rate")
-    _print_three("与任一 Core 不可达比例", "unreachable_to_any_core_rate")
-
     lines.append("")
     lines.append("-" * 90)
     lines.append("📅 月度趋势表")
@@ -270,28 +340,153 @@ def generate_repo_report(repo_name: str, repo_data: Dict[str, Any]) -> str:
     # periphery_to_core.monthly_summary
     # core_reachability.monthly_summary
 
-    nm_map = {m["month"]: m for m in newcomer.get("monthly_summary", [])}
-    pc_map = {m["month"]: m for m in p2c.get("monthly_summary", [])}
-    cr_map = {m["month"]: m for m in reach.get("monthly_summary", [])}
+    for mon, nm, pc, cr in _merge_monthly(
+        newcomer.get("monthly_summary", []),
+        p2c.get("monthly_summary", []),
+        reach.get("monthly_summary", []),
+    ):
+        lines.append(_MONTHLY_ROW(
+            mon,
+            _fmt(nm.get("newcomers", 0)),
+            _fmt(nm.get("avg_shortest_path_to_core"), "N/A"),
+            _fmt(pc.get("new_core_count", 0)),
+            _fmt(pc.get("avg_months_to_core"), "N/A"),
+            _fmt_pct(cr.get("unreachable_to_all_core_rate"), "N/A"),
+            _fmt_pct(cr.get("unreachable_to_any_core_rate"), "N/A"),
+        ))
 
-    all_months = sorted(set(nm_map.keys()) | set(pc_map.keys()) | set(cr_map.keys()))
+    lines.append("")
+    return "\n".join(lines)
 
-    for mon in all_months:
-        nm = nm_map.get(mon, {})
-        pc = pc_map.get(mon, {})
-        cr = cr_map.get(mon, {})
 
-        c0 = _fmt(nm.get("newcomers", 0))
-        c1 = _fmt(nm.get("avg_shortest_path_to_core"), "N/A")
-        c2 = _fmt(pc.get("new_core_count", 0))
-        c3 = _fmt(pc.get("avg_months_to_core"), "N/A")
-        c4 = _fmt_pct(cr.get("unreachable_to_all_core_rate"), "N/A")
-        c5 = _fmt_pct(cr.get("unreachable_to_any_core_rate"), "N/A")
+def _loads_json(raw: bytes) -> Any:
+    """解析 JSON 字节串；优先使用 orjson，遇到其不支持的内容（如旧版输出中的 NaN）时回退到标准库 json"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+def iter_repo_items(input_path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    逐个产出 (repo_name, repo_data)：
+    - *.jsonl：每行一个项目结果（含 repo_name 字段）
+    - *.json：安装 ijson 时流式解析顶层键值，否则一次性读入字节并解析（优先 orjson）
+    """
+    if input_path.suffix == ".jsonl":
+        with open(input_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    repo_data = _loads_json(line)
+                    yield repo_data["repo_name"], repo_data
+        return
 
-        lines.append(f"   {mon:<16} {c0:<10} {c1:<10} {c2:<10} {c3:<12} {c4:<12} {c5:<12}")
+    if ijson is not None:
+        with open(input_path, "rb") as f:
+            yield from ijson.kvitems(f, "", use_float=True)
+        return
 
-    lines.append("")
-    return "\n".join(lines)
+    data = _loads_json(input_path.read_bytes())
+    yield from data.items()
+
+
+# 入选项目少于该数时不启动进程池（进程启动与数据序列化开销大于渲染本身）
+_MIN_PARALLEL_REPOS = 16
+
+
+def _render_one(item: Tuple[str, Dict[str, Any], ScoreBundle]) -> Tuple[str, str]:
+    """多进程工作函数（模块级别，便于 pickle）"""
+    repo, repo_data, bundle = item
+    return repo, generate_repo_report(repo, repo_data, bundle)
+
+
+def render_repo_reports(
+    input_path: Path,
+    selected: Dict[str, ScoreBundle],
+    workers: int = 1,
+) -> Dict[str, str]:
+    """
+    为 selected（{repo: 评分}）中的项目生成报告文本：{repo: report}。
+    workers > 1 且项目数不少于 _MIN_PARALLEL_REPOS 时按项目分发到进程池
+    （map 保序，每个子进程只拿到自己那一份项目数据）。
+    """
+    seen: Set[str] = set()
+
+    def _selected_items() -> Iterator[Tuple[str, Dict[str, Any], ScoreBundle]]:
+        for repo, repo_data in iter_repo_items(input_path):
+            if repo in selected and repo not in seen:
+                seen.add(repo)
+                yield repo, repo_data, selected[repo]
+
+    if workers <= 1 or len(selected) < _MIN_PARALLEL_REPOS:
+        return dict(map(_render_one, _selected_items()))
+
+    chunksize = max(1, len(selected) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(_render_one, _selected_items(), chunksize=chunksize))
+
+
+# 机器可读输出（--output-format csv）的列：每行一个项目的一个月份，数值保持原样不做格式化
+MONTHLY_CSV_FIELDS = (
+    "rank",
+    "repo",
+    "health_score",
+    "month",
+    "newcomers",
+    "avg_shortest_path_to_core",
+    "new_core_count",
+    "avg_months_to_core",
+    "unreachable_to_all_core_rate",
+    "unreachable_to_any_core_rate",
+)
+
+
+def iter_monthly_rows(repo_name: str, repo_data: Dict[str, Any], health: float) -> Iterator[Tuple[Any, ...]]:
+    """按月份产出与 MONTHLY_CSV_FIELDS（去掉 rank）对应的原始数值行，缺失值为 None"""
+    newcomer = repo_data.get("newcomer_distance") or _EMPTY
+    p2c = repo_data.get("periphery_to_core") or _EMPTY
+    reach = repo_data.get("core_reachability") or _EMPTY
+    for mon, nm, pc, cr in _merge_monthly(
+        newcomer.get("monthly_summary", []),
+        p2c.get("monthly_summary", []),
+        reach.get("monthly_summary", []),
+    ):
+        yield (
+            repo_name,
+            health,
+            mon,
+            nm.get("newcomers"),
+            nm.get("avg_shortest_path_to_core"),
+            pc.get("new_core_count"),
+            pc.get("avg_months_to_core"),
+            cr.get("unreachable_to_all_core_rate"),
+            cr.get("unreachable_to_any_core_rate"),
+        )
+
+
+def write_monthly_csv(
+    input_path: Path,
+    repos_ranked: List[Tuple[str, ScoreBundle]],
+    output_path: Path,
+) -> int:
+    """按排名顺序写出入选项目的月度指标 CSV，返回数据行数"""
+    selected = dict(repos_ranked)
+    rows_by_repo: Dict[str, List[Tuple[Any, ...]]] = {}
+    for repo, repo_data in iter_repo_items(input_path):
+        if repo in selected and repo not in rows_by_repo:
+            rows_by_repo[repo] = list(iter_monthly_rows(repo, repo_data, selected[repo].health))
+
+    n_rows = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(MONTHLY_CSV_FIELDS)
+        for rank, (repo, _) in enumerate(repos_ranked, 1):
+            rows = rows_by_repo.pop(repo)
+            writer.writerows((rank, *row) for row in rows)
+            n_rows += len(rows)
+    return n_rows
 
 
 def main():
@@ -300,7 +495,7 @@ def main():
         "--input",
         type=str,
         default="output/newcomer-analysis/full_analysis.json",
-        help="输入分析文件路径",
+        help="输入分析文件路径（full_analysis.json 或 per_repo.jsonl）",
     )
     parser.add_argument(
         "--output",
@@ -320,6 +515,24 @@ def main():
         default=None,
         help="只输出前 N 个项目",
     )
+    parser.add_argument(
+        "--output-format",
+        choices=("text", "csv"),
+        default="text",
+        help="输出格式：text 为可读报告（默认），csv 为按项目×月份的原始指标表",
+    )
+    parser.add_argument(
+        "--max-health",
+        type=float,
+        default=None,
+        help="只报告健康分不高于该值的项目（健康分越低风险越高；默认不过滤）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="生成各项目报告的并行进程数（默认 1，即单进程）",
+    )
 
     args = parser.parse_args()
 
@@ -329,63 +542,77 @@ def main():
         return
 
     print(f"📖 读取分析数据: {input_path}")
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    repos_to_analyze = list(data.keys())
 
+    specified = None
     if args.repo:
-        specified = [r.strip() for r in args.repo.split(",") if r.strip()]
-        repos_to_analyze = [r for r in repos_to_analyze if r in specified]
-
-    # 计算分数并排序
-    repos_ranked: List[Tuple[str, float]] = []
-    for repo in repos_to_analyze:
-        score = _compute_health_score(data[repo])
-        repos_ranked.append((repo, score))
-
-    # 从大到小排序 (越大约好)
-    repos_ranked.sort(key=lambda x: x[1], reverse=True)
-
-    if args.top is not None:
-        repos_ranked = repos_ranked[: args.top]
+        specified = {r.strip() for r in args.repo.split(",") if r.strip()}
+
+    # 第一遍：只计算分数，不保留项目数据
+    scored: List[Tuple[str, ScoreBundle]] = []
+    for repo, repo_data in iter_repo_items(input_path):
+        if specified is not None and repo not in specified:
+            continue
+        bundle = compute_score_bundle(repo_data)
+        if args.max_health is not None and not bundle.health <= args.max_health:
+            continue
+        scored.append((repo, bundle))
+
+    # 按健康分从大到小排序 (越大约好)；nlargest 与稳定降序排序后截断的结果一致
+    if args.top is not None and args.top >= 0:
+        repos_ranked = heapq.nlargest(args.top, scored, key=lambda x: x[1].health)
+    else:
+        repos_ranked = sorted(scored, key=lambda x: x[1].health, reverse=True)
+        if args.top is not None:
+            repos_ranked = repos_ranked[: args.top]
 
     if not repos_ranked:
         print("❌ 没有符合条件的项目")
         return
 
-    # 生成报告
-    reports: List[str] = []
-    reports.append("=" * 90)
-    reports.append("🔍 OSS 项目新人体验与核心晋升分析报告")
-    reports.append("=" * 90)
-    reports.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    reports.append(f"分析项目数: {len(repos_ranked)}")
-    reports.append("")
-
-    # 1. 插入总览表
-    reports.append(generate_summary_table(repos_ranked, data))
-
-    # 2. 详细报告
-    for repo, _ in repos_ranked:
-        reports.append(generate_repo_report(repo, data[repo]))
-
-    full_report = "\n".join(reports)
-
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(full_report)
+
+    if args.output_format == "csv":
+        if output_path.suffix != ".csv":
+            output_path = output_path.with_suffix(".csv")
+        n_rows = write_monthly_csv(input_path, repos_ranked, output_path)
+        print(f"✅ 月度指标表已保存: {output_path}（{len(repos_ranked)} 个项目，{n_rows} 行）")
+        return
+
+    # 第二遍：只为入选项目生成报告文本
+    selected = dict(repos_ranked)
+    repo_reports = render_repo_reports(input_path, selected, workers=args.workers)
+
+    # 生成报告：表头与总览表先写，各项目报告按排名顺序写出后即释放
+    header = "\n".join([
+        "=" * 90,
+        "🔍 OSS 项目新人体验与核心晋升分析报告",
+        "=" * 90,
+        f"生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"分析项目数: {len(repos_ranked)}",
+        "",
+        generate_summary_table([(repo, bundle.health) for repo, bundle in repos_ranked]),
+    ])
+    preview: List[str] = []
+
+    with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write(header)
+        for idx, (repo, _) in enumerate(repos_ranked):
+            report = repo_reports.pop(repo)
+            f.write("\n")
+            f.write(report)
+            if idx < 3:
+                preview.append(report)
 
     print(f"✅ 报告已保存: {output_path}")
 
     # 控制台预览
     if len(repos_ranked) <= 3:
-        print("\n" + full_report)
+        print("\n" + "\n".join([header, *preview]))
     else:
         print("\n📋 前 3 个项目预览:\n")
-        for repo, _ in repos_ranked[:3]:
-            print(generate_repo_report(repo, data[repo]))
+        for report in preview:
+            print(report)
 
 
 if __name__ == "__main__":
@@ -18,19 +18,260 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools
 import json
-from collections import defaultdict
+import os
+import pickle
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
 
 import networkx as nx
 
 from src.utils.logger import get_logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = get_logger()
 
 
+# 月度图解析结果（actors, total_events）的 pickle 缓存；格式变化时递增版本号使旧缓存失效
+_ACTORS_CACHE_VERSION = 1
+
+
+def _dumps_json(data: Any) -> bytes:
+    """序列化为 2 空格缩进的 UTF-8 JSON（非 ASCII 原样保留）；优先使用 orjson，未安装时回退到标准库 json"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _loads_json(raw: bytes) -> Any:
+    """解析 JSON 字节串；优先使用 orjson，遇到其不支持的内容（如 NaN）时回退到标准库 json"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+_GRAPHML_NS = "{http://graphml.graphdrawing.org/xmlns}"
+_GRAPHML_GRAPH = _GRAPHML_NS + "graph"
+_GRAPHML_NODE = _GRAPHML_NS + "node"
+_GRAPHML_EDGE = _GRAPHML_NS + "edge"
+_GRAPHML_DATA = _GRAPHML_NS + "data"
+_GRAPHML_KEY = _GRAPHML_NS + "key"
+# 与 nx.read_graphml 相同的 attr.type -> Python 类型映射
+_GRAPHML_TYPES = {
+    "integer": int, "int": int, "long": int,
+    "float": float, "double": float,
+    "string": str, "yfiles": str, "boolean": bool,
+}
+_GRAPHML_BOOLS = {"true": True, "false": False, "0": False, "1": True}
+
+
+def _decode_graphml_value(key: Tuple[str, str], text: str) -> Any:
+    py_type = _GRAPHML_TYPES[key[1]]
+    if py_type is bool:
+        return _GRAPHML_BOOLS[text.lower()]
+    return py_type(text)
+
+
+def _extract_actors_fast(graph_path: Path) -> Optional[Tuple[List[Tuple[str, int]], Any]]:
+    """
+    流式解析 GraphML，只取 (login, degree) 与 total_events，不构建 NetworkX 图。
+    度数按 MultiDiGraph 口径计：有向边两端各 +1（自环 +2）；无向图转有向后每条边两端各 +2（自环仍 +2）。
+    节点顺序与 nx.read_graphml 一致（先按声明顺序，再按边中首次出现顺序补上未声明的节点）。
+    遇到本函数不处理的写法（嵌套图、超边、端口、多个图、无命名空间、边 id 重复等）返回 None，
+    由调用方回退到 NetworkX。
+    """
+    keys: Dict[str, Tuple[Optional[str], str]] = {}
+    node_data: Dict[str, List[Tuple[str, str]]] = {}
+    graph_data: List[Tuple[str, str]] = []
+    edge_ends: List[Tuple[str, str]] = []
+    edge_ids = set()
+    empty_keys = set()
+    directed = False
+    n_graphs = 0
+    in_graph = False
+    in_edge = False
+    node_id: Optional[str] = None
+
+    for event, elem in ElementTree.iterparse(str(graph_path), events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == _GRAPHML_NODE:
+                node_id = elem.get("id")
+                if node_id is None:
+                    return None
+                node_data.setdefault(node_id, [])
+            elif tag == _GRAPHML_EDGE:
+                in_edge = True
+            elif tag == _GRAPHML_GRAPH:
+                n_graphs += 1
+                if n_graphs > 1:
+                    return None
+                in_graph = True
+                directed = elem.get("edgedefault", "undirected") == "directed"
+            elif tag in (_GRAPHML_NS + "hyperedge", _GRAPHML_NS + "port"):
+                return None
+            continue
+
+        if tag == _GRAPHML_DATA:
+            if len(elem):
+                return None
+            # 空 <data/> 与 nx.read_graphml 一致按空串处理（如无 login 的 actor 写出 login=""）
+            text = elem.text or ""
+            if not text:
+                empty_keys.add(elem.get("key"))
+            if in_edge:
+                continue
+            if node_id is not None:
+                node_data[node_id].append((elem.get("key"), text))
+            elif in_graph:
+                graph_data.append((elem.get("key"), text))
+        elif tag == _GRAPHML_NODE:
+            node_id = None
+            elem.clear()
+        elif tag == _GRAPHML_EDGE:
+            in_edge = False
+            edge_dir = elem.get("directed")
+            if edge_dir is not None and (edge_dir == "true") != directed:
+                return None
+            src, dst = elem.get("source"), elem.get("target")
+            edge_id = elem.get("id")
+            if edge_id is not None:
+                pair = (src, dst) if directed else frozenset((src, dst))
+                if (pair, edge_id) in edge_ids:
+                    return None
+                edge_ids.add((pair, edge_id))
+            edge_ends.append((src, dst))
+            elem.clear()
+        elif tag == _GRAPHML_GRAPH:
+            in_graph = False
+        elif tag == _GRAPHML_KEY:
+            keys[elem.get("id")] = (elem.get("attr.name"), elem.get("attr.type", "string"))
+
+    if n_graphs != 1:
+        return None
+    if any(name is None or attr_type not in _GRAPHML_TYPES for name, attr_type in keys.values()):
+        return None
+    # 非字符串类型的空值不按类型转换，交给 nx.read_graphml 回退路径处理以保持相同结果
+    if any(k not in keys or _GRAPHML_TYPES[keys[k][1]] is not str for k in empty_keys):
+        return None
+
+    # 无向边转有向后成为一对反向边；无向自环只成为一条有向自环
+    weight = 1 if directed else 2
+    degrees: Counter = Counter()
+    for src, dst in edge_ends:
+        w = 1 if src == dst else weight
+        degrees[src] += w
+        degrees[dst] += w
+        node_data.setdefault(src, [])
+        node_data.setdefault(dst, [])
+
+    actors = []
+    for nid, data in node_data.items():
+        login = nid
+        for key_id, text in data:
+            if key_id not in keys:
+                return None
+            if keys[key_id][0] == "login":
+                login = _decode_graphml_value(keys[key_id], text)
+        actors.append((login, degrees.get(nid, 0)))
+
+    total_events = 0
+    for key_id, text in graph_data:
+        if key_id not in keys:
+            return None
+        if keys[key_id][0] == "total_events":
+            total_events = _decode_graphml_value(keys[key_id], text)
+    return actors, total_events
+
+
+def _parse_graph_actors(graph_path: str) -> Optional[Tuple[List[Tuple[str, int]], Any]]:
+    """
+    解析月度图，只取 (login, degree) 列表（按节点顺序）与 total_events。
+    常规 GraphML 走流式解析（_extract_actors_fast），不构建 NetworkX 图；
+    其余情况回退到 nx.read_graphml：有向图直接在读出的图上算度数，无向图先转有向图。
+    """
+    normalized_path = Path(str(graph_path).replace("\\", "/"))
+    try:
+        fast = _extract_actors_fast(normalized_path)
+    except Exception:
+        fast = None
+    if fast is not None:
+        return fast
+    try:
+        g = nx.read_graphml(normalized_path)
+        if not g.is_directed():
+            g = g.to_directed()
+        degrees = dict(g.degree())
+        actors = [
+            (attrs.get("login", str(node_id)), degrees.get(node_id, 0))
+            for node_id, attrs in g.nodes(data=True)
+        ]
+        return actors, g.graph.get("total_events", 0)
+    except Exception as e:
+        logger.warning(f"加载图失败: {graph_path}, 错误: {e}")
+        return None
+
+
+def _actors_cache_path(cache_dir: Path, graph_path: str) -> Path:
+    key = hashlib.sha1(str(Path(graph_path).resolve()).encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.pkl"
+
+
+def _load_graph_actors(
+    graph_path: str,
+    cache_dir: Optional[Path] = None,
+) -> Optional[Tuple[List[Tuple[str, int]], Any]]:
+    """
+    读取月度图的 (actors, total_events)（模块级别，便于多进程 pickle）。
+    cache_dir 不为空时先查缓存：(格式版本, mtime_ns, size) 未变化则跳过 GraphML 解析，未命中时解析并写入缓存。
+    """
+    stamp: Optional[Tuple[int, ...]] = None
+    if cache_dir is not None:
+        normalized_path = str(graph_path).replace("\\", "/")
+        try:
+            st = os.stat(normalized_path)
+            stamp = (_ACTORS_CACHE_VERSION, st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp is not None:
+            cache_path = _actors_cache_path(cache_dir, normalized_path)
+            try:
+                with open(cache_path, "rb") as f:
+                    cached_stamp, loaded = pickle.load(f)
+                if tuple(cached_stamp) == stamp:
+                    return loaded
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+                pass
+
+    loaded = _parse_graph_actors(graph_path)
+    if stamp is not None and loaded is not None:
+        tmp_path = cache_path.with_suffix(".tmp")
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump((stamp, loaded), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug(f"写入图缓存失败: {cache_path}, 错误: {e}")
+            tmp_path.unlink(missing_ok=True)
+    return loaded
+
+
 @dataclass
 class CoreMemberRecord:
     """单个月的核心成员记录"""
@@ -80,47 +321,30 @@ class PersonnelFlowAnalyzer:
         output_dir: str = "output/personnel-flow/",
         scope: str = "core",
         graphs_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        use_graph_cache: bool = True,
     ):
+        """
+        Args:
+            workers: scope=all 时并行读取月度图的进程数（None 表示使用 CPU 核心数，1 表示单进程）
+            use_graph_cache: scope=all 时缓存月度图的解析结果（<output_dir>/_actors_cache），重复运行跳过 GraphML 解析
+        """
         self.input_path = Path(input_path)
         self.output_dir = Path(output_dir)
         self.scope = scope  # "core" | "all"
         self.graphs_dir = Path(graphs_dir) if graphs_dir else None
+        self.workers = workers
+        self.use_graph_cache = use_graph_cache
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
     def _scope_label(self) -> str:
         return "全部贡献者" if self.scope == "all" else "核心成员"
 
-    def _load_graph(self, graph_path: str) -> Optional[nx.MultiDiGraph]:
-        """加载图（兼容 Windows 路径）"""
-        try:
-            normalized_path = Path(str(graph_path).replace("\\", "/"))
-            g = nx.read_graphml(normalized_path)
-            if isinstance(g, nx.MultiDiGraph):
-                return g
-            if isinstance(g, nx.DiGraph):
-                mg = nx.MultiDiGraph()
-                mg.add_nodes_from(g.nodes(data=True))
-                mg.add_edges_from(g.edges(data=True))
-                mg.graph.update(g.graph)
-                return mg
-            if isinstance(g, (nx.Graph, nx.MultiGraph)):
-                dg = g.to_directed()
-                mg = nx.MultiDiGraph()
-                mg.add_nodes_from(dg.nodes(data=True))
-                mg.add_edges_from(dg.edges(data=True))
-                mg.graph.update(dg.graph)
-                return mg
-            return None
-        except Exception as e:
-            logger.warning(f"加载图失败: {graph_path}, 错误: {e}")
-            return None
-
     def _load_burnout_data(self) -> Dict[str, Any]:
         """加载倦怠分析数据"""
         if not self.input_path.exists():
             raise FileNotFoundError(f"输入文件不存在: {self.input_path}")
-        with open(self.input_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _loads_json(self.input_path.read_bytes())
 
     def _build_all_actors_data_from_graphs(
         self,
@@ -135,7 +359,8 @@ class PersonnelFlowAnalyzer:
         with open(index_file, "r", encoding="utf-8") as f:
             index = json.load(f)
 
-        result = {}
+        # 先收集全部 (repo, month, 图路径)，各月度图相互独立，可并行读取
+        tasks: List[Tuple[str, str, str]] = []
         for repo_name in repo_names:
             graph_types = index.get(repo_name, {})
             first_val = next(iter(graph_types.values()), {})
@@ -145,38 +370,56 @@ class PersonnelFlowAnalyzer:
                 months_data = graph_types
             if not months_data or not isinstance(months_data, dict):
                 continue
-            metrics_series = []
             for month, graph_path in sorted(months_data.items()):
-                graph = self._load_graph(graph_path)
-                if graph is None:
-                    continue
-                degrees = dict(graph.degree())
-                # 按度数降序，构建 (login, degree) 列表
-                actors = []
-                for node_id in graph.nodes():
-                    login = graph.nodes[node_id].get("login", str(node_id))
-                    degree = degrees.get(node_id, 0)
-                    actors.append((login, degree))
-                actors.sort(key=lambda x: -x[1])
-                total_events = graph.graph.get("total_events", 0)
-                metrics_series.append({
-                    "month": month,
-                    "repo_name": repo_name,
-                    "unique_actors": len(actors),
-                    "total_events": total_events,
-                    "core_actors": actors,
-                })
-            if metrics_series:
-                result[repo_name] = {"metrics": metrics_series}
+                tasks.append((repo_name, month, graph_path))
+
+        result = {}
+        for (repo_name, month, _), loaded in zip(tasks, self._load_graphs_actors(tasks)):
+            if loaded is None:
+                continue
+            actors, total_events = loaded
+            # 按度数降序（稳定排序，同度数保持节点顺序）
+            actors.sort(key=lambda x: -x[1])
+            result.setdefault(repo_name, {"metrics": []})["metrics"].append({
+                "month": month,
+                "repo_name": repo_name,
+                "unique_actors": len(actors),
+                "total_events": total_events,
+                "core_actors": actors,
+            })
         return result
 
+    def _load_graphs_actors(
+        self,
+        tasks: List[Tuple[str, str, str]],
+    ) -> Iterator[Optional[Tuple[List[Tuple[str, int]], Any]]]:
+        """按 tasks 顺序逐个产出 _load_graph_actors 的结果；workers > 1 时用进程池（map 保序）"""
+        paths = [graph_path for _, _, graph_path in tasks]
+        cache_dir = self.output_dir / "_actors_cache" if self.use_graph_cache else None
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        workers = max(1, min(workers, len(paths)))
+        if workers == 1:
+            for graph_path in paths:
+                yield _load_graph_actors(graph_path, cache_dir)
+            return
+
+        logger.info(f"使用 {workers} 个工作进程读取 {len(paths)} 个月度图")
+        chunksize = max(1, len(paths) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_load_graph_actors, paths, itertools.repeat(cache_dir), chunksize=chunksize)
+
     def _extract_core_per_month(
         self,
         metrics_series: List[Dict],
     ) -> Dict[str, List[CoreMemberRecord]]:
         """从 metrics 序列提取每月核心成员列表"""
         core_by_month: Dict[str, List[CoreMemberRecord]] = {}
-        sorted_metrics = sorted(metrics_series, key=lambda m: m.get("month", ""))
+        month_keys = [m.get("month", "") for m in metrics_series]
+        if all(a <= b for a, b in zip(month_keys, month_keys[1:])):
+            # 上游 metrics 通常已按月份有序，跳过重排
+            sorted_metrics = metrics_series
+        else:
+            sorted_metrics = sorted(metrics_series, key=lambda m: m.get("month", ""))
 
         for m in sorted_metrics:
             month = m.get("month", "")
@@ -229,25 +472,35 @@ class PersonnelFlowAnalyzer:
             )
         return timelines
 
-    def _detect_join_leave_events(
+    def _month_diff_pass(
         self,
         core_by_month: Dict[str, List[CoreMemberRecord]],
         repo_name: str,
         timelines: Dict[str, MemberTimeline],
-    ) -> Tuple[List[Dict], List[Dict]]:
-        """检测流入流出事件"""
-        months = sorted(core_by_month.keys())
+        months: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """
+        逐月比较相邻两期核心成员，一次遍历同时产出流入事件、流出事件与各期流动统计。
+        months 为已排序的月份列表，未提供时现排。
+        """
+        if months is None:
+            months = sorted(core_by_month.keys())
         join_events = []
         leave_events = []
+        period_churn = []
 
         prev_core = set()
+        # 曾进入前 3 名的成员（一次性预计算，流出事件按集合查询）
+        top3_ever = {r.login for recs in core_by_month.values() for r in recs if r.rank <= 3}
 
         for month in months:
             curr_core_logins = {r.login for r in core_by_month[month]}
             curr_core_map = {r.login: (r.degree, r.rank) for r in core_by_month[month]}
+            joined = curr_core_logins - prev_core
+            left = prev_core - curr_core_logins
 
             # 流入：本月在、上月不在
-            for login in curr_core_logins - prev_core:
+            for login in joined:
                 degree, rank = curr_core_map[login]
                 join_events.append({
                     "month": month,
@@ -258,14 +511,10 @@ class PersonnelFlowAnalyzer:
                 })
 
             # 流出：上月在、本月不在（tenure 从 timeline 补全）
-            for login in prev_core - curr_core_logins:
+            for login in left:
                 t = timelines.get(login)
                 tenure = t.tenure_months if t else 0
-                was_top_3 = any(
-                    r.login == login and r.rank <= 3
-                    for recs in core_by_month.values()
-                    for r in recs
-                )
+                was_top_3 = login in top3_ever
                 leave_events.append({
                     "month": month,
                     "login": login,
@@ -274,9 +523,16 @@ class PersonnelFlowAnalyzer:
                     "repo_name": repo_name,
                 })
 
+            period_churn.append({
+                "month": month,
+                "core_count": len(curr_core_logins),
+                "joined": len(joined),
+                "left": len(left),
+                "net_change": len(curr_core_logins) - len(prev_core),
+            })
             prev_core = curr_core_logins
 
-        return join_events, leave_events
+        return join_events, leave_events, period_churn
 
     def _compute_retention_rates(
         self,
@@ -292,29 +548,6 @@ class PersonnelFlowAnalyzer:
             retention[n] = round(retained / len(timelines), 4)
         return retention
 
-    def _compute_period_churn(
-        self,
-        core_by_month: Dict[str, List[CoreMemberRecord]],
-    ) -> List[Dict]:
-        """计算各期流动统计"""
-        months = sorted(core_by_month.keys())
-        result = []
-        prev_core = set()
-
-        for month in months:
-            curr_core = {r.login for r in core_by_month[month]}
-            joined = len(curr_core - prev_core)
-            left = len(prev_core - curr_core)
-            result.append({
-                "month": month,
-                "core_count": len(curr_core),
-                "joined": joined,
-                "left": left,
-                "net_change": len(curr_core) - len(prev_core),
-            })
-            prev_core = curr_core
-        return result
-
     def _identify_critical_departures(
         self,
         leave_events: List[Dict],
@@ -357,8 +590,9 @@ class PersonnelFlowAnalyzer:
                             "rank": rank,
                             "degree": degree,
                         })
-        for k in index:
-            index[k].sort(key=lambda x: (x["month"], x["repo"]))
+        by_month_repo = itemgetter("month", "repo")
+        for appearances in index.values():
+            appearances.sort(key=by_month_repo)
         return dict(index)
 
     def _find_flow_destinations(
@@ -376,19 +610,23 @@ class PersonnelFlowAnalyzer:
         appearances = global_index.get(login, [])
         flow_to = []
         seen_repos = set()
+        # appearances 已按 (month, repo) 排序：二分跳过离开前的记录，截止月份只算一次
+        start = bisect_left(appearances, leave_month, key=itemgetter("month"))
+        end_month: Optional[str] = None
 
-        for a in appearances:
+        for a in itertools.islice(appearances, start, None):
             repo = a["repo"]
             month = a["month"]
             if repo == from_repo:
                 continue
             if repo in seen_repos:
                 continue
-            if month < leave_month:
-                continue
             # 简单月数差：假设 YYYY-MM 可直接比较
-            if months_after >= 0 and month > self._month_add(leave_month, months_after):
-                break
+            if months_after >= 0:
+                if end_month is None:
+                    end_month = self._month_add(leave_month, months_after)
+                if month > end_month:
+                    break
             seen_repos.add(repo)
             flow_to.append({
                 "repo": repo,
@@ -401,14 +639,8 @@ class PersonnelFlowAnalyzer:
     def _month_add(self, month_str: str, n: int) -> str:
         """YYYY-MM + n 个月"""
         y, m = map(int, month_str.split("-"))
-        m += n
-        while m > 12:
-            m -= 12
-            y += 1
-        while m < 1:
-            m += 12
-            y -= 1
-        return f"{y:04d}-{m:02d}"
+        y, m0 = divmod(y * 12 + (m - 1) + n, 12)
+        return f"{y:04d}-{m0 + 1:02d}"
 
     def analyze_repo(
         self,
@@ -420,14 +652,14 @@ class PersonnelFlowAnalyzer:
             return {"error": "数据不足，需要至少 2 个月"}
 
         core_by_month = self._extract_core_per_month(metrics_series)
+        # core_by_month 按月份升序插入，键顺序即排序结果
+        months = list(core_by_month)
         timelines = self._build_member_timelines(core_by_month)
-        join_events, leave_events = self._detect_join_leave_events(
-            core_by_month, repo_name, timelines
+        join_events, leave_events, period_churn = self._month_diff_pass(
+            core_by_month, repo_name, timelines, months
         )
-        period_churn = self._compute_period_churn(core_by_month)
         critical_departures = self._identify_critical_departures(leave_events, timelines)
 
-        months = sorted(core_by_month.keys())
         retention = self._compute_retention_rates(timelines, len(months))
 
         # 汇总
@@ -503,29 +735,28 @@ class PersonnelFlowAnalyzer:
         for repo_name, repo_result in results.items():
             if "error" in repo_result:
                 continue
-            for evt in repo_result.get("leave_events", []):
-                flow_to = self._find_flow_destinations(
-                    evt["login"],
-                    evt["repo_name"],
-                    evt["month"],
-                    global_index,
-                    months_after=flow_months_after,
-                )
-                evt["flowed_to"] = flow_to
-            for evt in repo_result.get("critical_departures", []):
-                flow_to = self._find_flow_destinations(
-                    evt["login"],
-                    evt["repo_name"],
-                    evt["month"],
-                    global_index,
-                    months_after=flow_months_after,
-                )
-                evt["flowed_to"] = flow_to
+            # 关键流失是流出事件的子集，同一 (login, repo, month) 的流向只算一次
+            flows: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+            for evt in repo_result.get("leave_events", []) + repo_result.get("critical_departures", []):
+                key = (evt["login"], evt["repo_name"], evt["month"])
+                flow_to = flows.get(key)
+                if flow_to is None:
+                    flow_to = self._find_flow_destinations(
+                        evt["login"],
+                        evt["repo_name"],
+                        evt["month"],
+                        global_index,
+                        months_after=flow_months_after,
+                    )
+                    flows[key] = flow_to
+                    evt["flowed_to"] = flow_to
+                else:
+                    evt["flowed_to"] = list(flow_to)
 
         # 保存
         output_file = self.output_dir / "personnel_flow.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(output_file, "wb") as f:
+            f.write(_dumps_json(results))
         logger.info(f"已保存: {output_file}")
 
         # 生成报告
@@ -578,21 +809,24 @@ class PersonnelFlowAnalyzer:
     def _save_flow_statistics(self, results: Dict[str, Any]) -> None:
         """统计整体 repo→repo 流向，按频次排序"""
         report_path = self.output_dir / "flow_statistics.txt"
-        flow_counts: Dict[Tuple[str, str], int] = defaultdict(int)
         seen = set()
-        for repo_name, repo_result in results.items():
-            if "error" in repo_result:
-                continue
-            for evt in repo_result.get("leave_events", []):
-                key = (evt["login"], repo_name, evt["month"])
-                if key in seen:
+
+        def _flow_pairs():
+            for from_repo, repo_result in results.items():
+                if "error" in repo_result:
                     continue
-                seen.add(key)
-                from_repo = repo_name
-                for dest in evt.get("flowed_to", []):
-                    to_repo = dest["repo"]
-                    if from_repo != to_repo:
-                        flow_counts[(from_repo, to_repo)] += 1
+                for evt in repo_result.get("leave_events", []):
+                    key = (evt["login"], from_repo, evt["month"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    for dest in evt.get("flowed_to", []):
+                        to_repo = dest["repo"]
+                        if from_repo != to_repo:
+                            yield from_repo, to_repo
+
+        # Counter 按首次出现顺序计数（与逐个累加的 defaultdict 顺序一致）
+        flow_counts: Counter = Counter(_flow_pairs())
 
         sorted_flows = sorted(
             flow_counts.items(),
@@ -1244,6 +1478,17 @@ def main():
         default=None,
         help="月度图目录（scope=all 时必填，需与 burnout 分析使用的图一致）",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="scope=all 时并行读取月度图的进程数（默认使用 CPU 核心数，1 表示单进程）",
+    )
+    parser.add_argument(
+        "--no-graph-cache",
+        action="store_true",
+        help="scope=all 时不使用/不写入月度图解析缓存（<output-dir>/_actors_cache），每次都重新解析 GraphML",
+    )
     parser.add_argument(
         "--flow-months",
         type=int,
@@ -1264,6 +1509,8 @@ def main():
         output_dir=output_dir,
         scope=args.scope,
         graphs_dir=args.graphs_dir,
+        workers=args.workers,
+        use_graph_cache=not args.no_graph_cache,
     )
     analyzer.run(flow_months_after=args.flow_months)
 
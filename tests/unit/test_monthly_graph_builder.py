@@ -0,0 +1,281 @@
+"""
+按月图构建器单元测试
+"""
+
+import json
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import networkx as nx
+
+from src.analysis.monthly_graph_builder import (
+    _add_multiedges_unchecked,
+    _bundle_tasks,
+    _quick_graph_size_estimate,
+    _sanitize_xml_text,
+    _write_index_delta,
+    build_actor_actor_graph,
+    build_actor_repo_graph,
+    build_monthly_graphs_parallel,
+    compact_index,
+    get_processed_months,
+    load_index,
+    populate_actor_repo_graph,
+    sanitize_graphml_attributes,
+    write_graphml_stream,
+)
+
+
+def _read_edges(g):
+    """统一 MultiDiGraph / DiGraph 读回后的边表示"""
+    if g.is_multigraph():
+        return sorted((u, v, k, tuple(sorted(d.items()))) for u, v, k, d in g.edges(keys=True, data=True))
+    return sorted(
+        (u, v, d["id"], tuple(sorted((a, b) for a, b in d.items() if a != "id")))
+        for u, v, d in g.edges(data=True)
+    )
+
+
+class TestSanitizeXmlText(unittest.TestCase):
+    """XML 文本清洗测试"""
+
+    def test_removes_invalid_chars_and_escapes(self):
+        """去掉非法字符（保留 \\t \\n \\r 与非 BMP 字符），并转义特殊字符"""
+        text = "a\x00b\x1f\t\n\r\ud800\ufffe\uffff😀<&>\"'"
+        self.assertEqual(
+            _sanitize_xml_text(text),
+            "ab\t\n\r😀&lt;&amp;&gt;&quot;&apos;",
+        )
+
+    def test_none_and_non_str(self):
+        """None 返回空串，非字符串先转为字符串"""
+        self.assertEqual(_sanitize_xml_text(None), "")
+        self.assertEqual(_sanitize_xml_text(12), "12")
+
+
+class TestWriteGraphmlStream(unittest.TestCase):
+    """流式 GraphML 写出测试"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def _create_test_graph(self):
+        g = nx.MultiDiGraph()
+        g.graph.update({"repo_name": "a/b", "month": "2023-01", "total_events": 3})
+        g.add_node("actor:1", node_type="Actor", login="x&y<z>", event_count=2, ratio=0.5)
+        g.add_node("actor:2", node_type="Actor", login="bad\x01char", event_count=1, ratio=1.0)
+        g.add_edge("actor:1", "actor:2", key="e1", edge_type="REPLY", comment_body='a "quoted" & <b>')
+        g.add_edge("actor:1", "actor:2", key="e2", edge_type="REPLY", comment_body=None)
+        return g
+
+    def test_matches_networkx_writer(self):
+        """读回结果应与 sanitize + nx.write_graphml 完全一致"""
+        expected_path = self.temp_dir / "expected.graphml"
+        actual_path = self.temp_dir / "actual.graphml"
+
+        write_graphml_stream(self._create_test_graph(), str(actual_path))
+        g = self._create_test_graph()
+        sanitize_graphml_attributes(g)
+        nx.write_graphml(g, str(expected_path))
+
+        expected = nx.read_graphml(str(expected_path))
+        actual = nx.read_graphml(str(actual_path))
+        self.assertEqual(expected.graph, actual.graph)
+        self.assertEqual(dict(expected.nodes(data=True)), dict(actual.nodes(data=True)))
+        self.assertEqual(_read_edges(expected), _read_edges(actual))
+
+    def test_does_not_mutate_graph(self):
+        """写出不应修改原图属性"""
+        g = self._create_test_graph()
+        write_graphml_stream(g, str(self.temp_dir / "g.graphml"))
+        self.assertEqual(g.nodes["actor:1"]["login"], "x&y<z>")
+
+    def test_unsupported_type_removes_partial_file(self):
+        """不支持的属性类型应抛出异常且不留下半成品文件"""
+        g = self._create_test_graph()
+        g.nodes["actor:1"]["bad"] = object()
+        path = self.temp_dir / "bad.graphml"
+        with self.assertRaises(TypeError):
+            write_graphml_stream(g, str(path))
+        self.assertFalse(path.exists())
+
+
+class TestPopulateGraph(unittest.TestCase):
+    """复用图对象构建测试"""
+
+    def _events(self, actor_id):
+        return [
+            {
+                "id": f"{actor_id}-{i}",
+                "type": "PushEvent",
+                "actor": {"id": actor_id, "login": f"user{actor_id}"},
+                "repo": {"id": 100, "name": "a/b"},
+                "payload": {"size": 1},
+                "created_at": "2023-01-01T00:00:00Z",
+            }
+            for i in range(3)
+        ]
+
+    def test_populate_clears_previous_content(self):
+        """复用图对象时应清空上一次的内容，结果与新建图一致"""
+        graph = nx.MultiDiGraph()
+        populate_actor_repo_graph(graph, self._events(1), "a/b", "2023-01")
+        populate_actor_repo_graph(graph, self._events(2), "a/b", "2023-02")
+        fresh = build_actor_repo_graph(self._events(2), "a/b", "2023-02")
+
+        self.assertEqual(graph.graph, fresh.graph)
+        self.assertEqual(dict(graph.nodes(data=True)), dict(fresh.nodes(data=True)))
+        self.assertEqual(
+            list(graph.edges(keys=True, data=True)),
+            list(fresh.edges(keys=True, data=True)),
+        )
+        self.assertNotIn("actor:1", graph)
+
+
+class TestAddMultiedgesUnchecked(unittest.TestCase):
+    """直接写邻接字典的批量加边测试"""
+
+    def test_matches_add_edge(self):
+        """结果应与逐条 add_edge 一致（含缺失端点、重复 key、自环）"""
+        rows = [
+            ("a", "b", "k1", {"w": 1}),
+            ("a", "b", "k2", {"w": 2}),
+            ("a", "b", "k1", {"x": 3}),
+            ("b", "c", "k1", {"w": 4}),
+            ("c", "c", "k3", {"w": 5}),
+        ]
+        expected = nx.MultiDiGraph()
+        expected.add_node("a", t=1)
+        for u, v, k, attrs in rows:
+            expected.add_edge(u, v, key=k, **attrs)
+
+        actual = nx.MultiDiGraph()
+        actual.add_node("a", t=1)
+        _add_multiedges_unchecked(actual, [(u, v, k, dict(a)) for u, v, k, a in rows])
+
+        self.assertEqual(dict(actual.nodes(data=True)), dict(expected.nodes(data=True)))
+        self.assertEqual(
+            list(actual.edges(keys=True, data=True)),
+            list(expected.edges(keys=True, data=True)),
+        )
+        self.assertEqual(list(actual.predecessors("c")), list(expected.predecessors("c")))
+        self.assertIs(actual._succ["a"]["b"], actual._pred["b"]["a"])
+
+
+class TestQuickGraphSizeEstimate(unittest.TestCase):
+    """构建前节点数快速估计测试"""
+
+    def _push(self, actor_id):
+        return {"type": "PushEvent", "actor": {"id": actor_id}, "repo": {"id": 100}, "payload": {}}
+
+    def test_single_actor_skips_actor_actor(self):
+        """只有一个 actor 时 actor-actor 图必然为空，actor-repo 图仍有两个节点"""
+        events = [self._push(1), self._push(1), self._push(1)]
+        self.assertLess(_quick_graph_size_estimate(events, "actor-actor"), 2)
+        self.assertEqual(build_actor_actor_graph(events, "a/b", "2023-01").number_of_nodes(), 0)
+        self.assertEqual(_quick_graph_size_estimate(events, "actor-repo"), 2)
+
+    def test_issue_creator_counts_as_actor(self):
+        """Issue 创建者来自 payload 时也应计入"""
+        events = [{
+            "type": "IssueCommentEvent",
+            "actor": {"id": 1},
+            "repo": {"id": 100},
+            "payload": {"issue": {"number": 5, "user": {"id": 2}}},
+        }]
+        self.assertEqual(_quick_graph_size_estimate(events, "actor-actor"), 2)
+        self.assertEqual(_quick_graph_size_estimate(events, "actor-discussion"), 2)
+
+
+class TestBundleTasks(unittest.TestCase):
+    """并行任务打包测试"""
+
+    def test_balances_load_and_keeps_all_tasks(self):
+        """所有任务恰好出现一次，且各包事件总量接近均衡"""
+        sizes = [100, 60, 50, 40, 30, 20, 10, 5, 5, 5]
+        bundles = _bundle_tasks([(size, i) for i, size in enumerate(sizes)], 3)
+        self.assertEqual(sorted(t for b in bundles for t in b), list(range(len(sizes))))
+        loads = [sum(sizes[t] for t in b) for b in bundles]
+        self.assertEqual(len(bundles), 3)
+        self.assertLessEqual(max(loads) - min(loads), max(sizes))
+
+    def test_fewer_tasks_than_bundles(self):
+        """任务数少于目标包数时每个任务单独成包"""
+        self.assertEqual(_bundle_tasks([(3, "a"), (5, "b")], 16), [["b"], ["a"]])
+        self.assertEqual(_bundle_tasks([], 16), [])
+
+
+class TestIndexDelta(unittest.TestCase):
+    """增量索引与合并测试"""
+
+    def setUp(self):
+        self.output_dir = Path(tempfile.mkdtemp())
+        with open(self.output_dir / "index.json", "w", encoding="utf-8") as f:
+            json.dump({"a/b": {"actor-actor": {"2023-01": "old.graphml"}}}, f)
+
+    def test_compact_merges_deltas_into_index(self):
+        """增量记录应合并进 index.json，且合并后删除增量文件"""
+        _write_index_delta(self.output_dir, [
+            ("a/b", "actor-actor", "2023-02", "a.graphml"),
+            ("c/d", "actor-repo", "2023-02", "c.graphml"),
+        ])
+        self.assertEqual(get_processed_months(str(self.output_dir)), {"2023-01", "2023-02"})
+
+        index = compact_index(str(self.output_dir))
+
+        with open(self.output_dir / "index.json", "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), index)
+        self.assertEqual(index["a/b"]["actor-actor"], {"2023-01": "old.graphml", "2023-02": "a.graphml"})
+        self.assertEqual(index["c/d"]["actor-repo"], {"2023-02": "c.graphml"})
+        self.assertEqual(list(self.output_dir.glob("index.delta.*.json")), [])
+
+    def test_load_index_includes_pending_deltas(self):
+        """load_index 应包含未合并的增量，且不改写任何文件"""
+        _write_index_delta(self.output_dir, [("c/d", "actor-repo", "2023-02", "c.graphml")])
+        index = load_index(str(self.output_dir))
+        self.assertEqual(index["c/d"]["actor-repo"], {"2023-02": "c.graphml"})
+        self.assertEqual(index["a/b"]["actor-actor"], {"2023-01": "old.graphml"})
+        self.assertEqual(len(list(self.output_dir.glob("index.delta.*.json"))), 1)
+        with open(self.output_dir / "index.json", "r", encoding="utf-8") as f:
+            self.assertNotIn("c/d", json.load(f))
+
+    def test_compact_without_orjson(self):
+        """未安装 orjson 时回退到标准库 json，输出格式一致"""
+        _write_index_delta(self.output_dir, [("c/d", "actor-repo", "2023-02", "目录/c.graphml")])
+        with mock.patch("src.analysis.monthly_graph_builder.orjson", None):
+            index = compact_index(str(self.output_dir))
+        with open(self.output_dir / "index.json", "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), json.dumps(index, indent=2, ensure_ascii=False))
+
+    def test_compact_without_merge_drops_existing(self):
+        """merge_existing=False 时只保留增量中的条目"""
+        _write_index_delta(self.output_dir, [("c/d", "actor-repo", "2023-02", "c.graphml")])
+        index = compact_index(str(self.output_dir), merge_existing=False)
+        self.assertEqual(index, {"c/d": {"actor-repo": {"2023-02": "c.graphml"}}})
+
+
+
+class TestParallelBundleFailure(unittest.TestCase):
+    """并行构建中任务包失败的处理"""
+
+    def test_failed_bundle_aborts_without_index(self):
+        """任务包失败时中止构建，不写出缺项的索引，并清理事件缓存"""
+        monthly = {"2023-01": {"a/x": [{}] * 3, "b/y": [{}] * 4}}
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch("src.analysis.monthly_graph_builder.load_filtered_data", return_value=[]), \
+                mock.patch("src.analysis.monthly_graph_builder.group_by_month_and_repo", return_value=monthly), \
+                mock.patch("src.analysis.monthly_graph_builder._process_repo_bundle", side_effect=RuntimeError("boom")), \
+                mock.patch("concurrent.futures.ProcessPoolExecutor", ThreadPoolExecutor):
+            # 线程池代替进程池，使 patch 在工作线程中生效
+            with self.assertRaises(RuntimeError):
+                build_monthly_graphs_parallel(data_dir=tmp, output_dir=tmp, workers=2)
+            self.assertFalse((Path(tmp) / "index.json").exists())
+            self.assertEqual(list(Path(tmp).glob("index.delta.*.json")), [])
+            self.assertFalse((Path(tmp) / "_cache").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+"""
+新人/核心演化分析器单元测试
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import networkx as nx
+
+from src.analysis.newcomer_analyzer import (
+    NewcomerAnalyzer,
+    _distances_to_core,
+    _compute_volatility,
+    _count_unreachable_to_core,
+    _linear_regression_slope,
+    _month_to_int,
+    _months_diff,
+    _new_in_order,
+    _strip_graph,
+    _write_json,
+)
+
+
+class TestMonthArithmetic(unittest.TestCase):
+    """月份整数运算测试"""
+
+    def test_months_diff(self):
+        """跨年与同月的月份差"""
+        self.assertEqual(_months_diff("2023-01", "2023-01"), 0)
+        self.assertEqual(_months_diff("2022-11", "2023-02"), 3)
+        self.assertEqual(_months_diff("2023-05", "2022-05"), -12)
+
+    def test_month_to_int_is_consecutive(self):
+        """12 月与次年 1 月相邻"""
+        self.assertEqual(_month_to_int("2024-01") - _month_to_int("2023-12"), 1)
+
+    def test_invalid_month_raises(self):
+        """非法格式应抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            _month_to_int("2023")
+
+
+    def test_new_in_order_keeps_node_order(self):
+        """新出现节点按原顺序返回，支持 dict.keys() 作为已见集合"""
+        seen = {"b": "2023-01"}
+        self.assertEqual(_new_in_order(["c", "b", "a"], seen.keys()), ["c", "a"])
+        self.assertEqual(_new_in_order(["b"], {"b"}), [])
+
+
+class TestSeriesStatistics(unittest.TestCase):
+    """趋势斜率与波动率测试"""
+
+    def test_slope(self):
+        """直线斜率、常数序列与过短序列"""
+        self.assertAlmostEqual(_linear_regression_slope([1.0, 3.0, 5.0, 7.0]), 2.0)
+        self.assertAlmostEqual(_linear_regression_slope([4.0, 4.0, 4.0]), 0.0)
+        self.assertEqual(_linear_regression_slope([1.0]), 0.0)
+
+    def test_volatility_skips_non_positive_prev(self):
+        """prev<=0 或 None 的变化被跳过，使用总体标准差"""
+        # 0->1 被跳过；有效变化：1->2 (+1.0)，2->1 (-0.5)
+        self.assertAlmostEqual(_compute_volatility([0.0, 1.0, 2.0, 1.0]), 0.75)
+        self.assertEqual(_compute_volatility([1.0, None, 2.0]), 0.0)
+        self.assertEqual(_compute_volatility([1.0, 2.0]), 0.0)
+
+
+class TestCoreDistances(unittest.TestCase):
+    """到核心成员距离/可达性测试"""
+
+    def setUp(self):
+        # 0-1-2-3 路径 + 孤立分量 4-5
+        self.g = nx.Graph([("0", "1"), ("1", "2"), ("2", "3"), ("4", "5")])
+        self.g.add_node("6")
+
+    def _brute(self, sources, core):
+        out = {}
+        for s in sources:
+            lengths = nx.single_source_shortest_path_length(self.g, s)
+            out[s] = sorted(lengths[c] for c in core if c != s and c in lengths)
+        return out
+
+    def test_both_bfs_directions_match(self):
+        """按 source 与按 core 做 BFS 结果一致（含 source 自身为 core）"""
+        core = ["1", "3", "4"]
+        for sources in (["0"], ["0", "2", "3", "5", "6"]):
+            got = {k: sorted(v) for k, v in _distances_to_core(self.g, sources, core).items()}
+            self.assertEqual(got, self._brute(sources, core))
+
+    def test_count_unreachable_to_core(self):
+        """按连通分量统计 all/any 不可达"""
+        # 0、2 可达 2/3 个 core；5 可达 1/3；6 不可达任何 core
+        self.assertEqual(
+            _count_unreachable_to_core(self.g, ["1", "3", "4"], ["0", "2", "5", "6"]),
+            (1, 4),
+        )
+        self.assertEqual(_count_unreachable_to_core(self.g, ["1"], ["0", "2", "3"]), (0, 0))
+
+
+class TestIdentifyCoreMembers(unittest.TestCase):
+    """核心成员识别测试"""
+
+    def test_star_hub_selected_first(self):
+        """星型图中心度数最高，排在首位；至少补齐 2 人"""
+        g = nx.DiGraph()
+        for i in range(1, 6):
+            g.add_node(f"actor:{i}", login=f"u{i}", actor_id=str(i))
+            g.add_edge("actor:0", f"actor:{i}")
+        g.nodes["actor:0"].update(login="hub", actor_id="0")
+        analyzer = NewcomerAnalyzer.__new__(NewcomerAnalyzer)
+        node_ids, actor_ids, logins = analyzer.identify_core_members(g)
+        self.assertEqual(node_ids[0], "actor:0")
+        self.assertEqual(logins[0], "hub")
+        self.assertEqual(actor_ids[0], 0)
+        self.assertGreaterEqual(len(node_ids), 2)
+
+    def test_empty_graph(self):
+        """空图返回空结果"""
+        analyzer = NewcomerAnalyzer.__new__(NewcomerAnalyzer)
+        self.assertEqual(analyzer.identify_core_members(nx.MultiDiGraph()), ([], [], []))
+
+
+class TestGraphCache(unittest.TestCase):
+    """解析后图缓存测试"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.graph_path = self.tmp / "g.graphml"
+        g = nx.MultiDiGraph()
+        g.add_edge("actor:1", "actor:2", edge_type="COMMENT")
+        nx.write_graphml(g, self.graph_path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cache_hit_and_invalidation(self):
+        """命中时与直接解析一致；源文件变化后重新解析"""
+        analyzer = NewcomerAnalyzer(graphs_dir=str(self.tmp), output_dir=str(self.tmp / "out"))
+        first = analyzer.load_graph(str(self.graph_path))
+        self.assertTrue(analyzer._graph_cache_path(str(self.graph_path)).exists())
+        cached = analyzer.load_graph(str(self.graph_path))
+        self.assertEqual(sorted(cached.edges(data=True)), sorted(first.edges(data=True)))
+
+        g = nx.MultiDiGraph()
+        g.add_edge("actor:1", "actor:3")
+        nx.write_graphml(g, self.graph_path)
+        st = os.stat(self.graph_path)
+        os.utime(self.graph_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        reloaded = analyzer.load_graph(str(self.graph_path))
+        self.assertIn("actor:3", reloaded)
+
+    def test_strip_graph_keeps_topology(self):
+        """精简图保留平行边/度数与所需节点属性，丢弃边属性"""
+        g = nx.MultiDiGraph()
+        g.add_node("actor:1", node_type="Actor", login="a", actor_id=1, event_types="{...}")
+        g.add_edge("actor:1", "actor:2", comment_body="long text")
+        g.add_edge("actor:1", "actor:2", comment_body="more")
+        stripped = _strip_graph(g)
+        self.assertIsInstance(stripped, nx.MultiDiGraph)
+        self.assertEqual(dict(stripped.degree()), dict(g.degree()))
+        self.assertEqual(stripped.nodes["actor:1"], {"node_type": "Actor", "login": "a", "actor_id": 1})
+        self.assertTrue(all(not d for _, _, d in stripped.edges(data=True)))
+
+    def test_cache_disabled(self):
+        """关闭缓存时不写缓存目录，返回的图与启用缓存时一致"""
+        analyzer = NewcomerAnalyzer(
+            graphs_dir=str(self.tmp), output_dir=str(self.tmp / "out"), use_graph_cache=False
+        )
+        uncached = analyzer.load_graph(str(self.graph_path))
+        self.assertFalse(analyzer.graph_cache_dir.exists())
+        cached = NewcomerAnalyzer(
+            graphs_dir=str(self.tmp), output_dir=str(self.tmp / "out-cached")
+        ).load_graph(str(self.graph_path))
+        self.assertEqual(sorted(uncached.edges(data=True)), sorted(cached.edges(data=True)))
+        self.assertEqual(dict(uncached.nodes(data=True)), dict(cached.nodes(data=True)))
+
+
+class TestWriteJson(unittest.TestCase):
+    """结果 JSON 写出测试"""
+
+    def test_orjson_and_fallback_match(self):
+        """orjson 与标准库 json 写出的内容一致"""
+        data = {"仓库/a": {"records": [{"v": 0.5, "n": None}], "empty": []}}
+        with tempfile.TemporaryDirectory() as tmp:
+            fast = Path(tmp) / "fast.json"
+            slow = Path(tmp) / "slow.json"
+            _write_json(data, fast)
+            with mock.patch("src.analysis.newcomer_analyzer.orjson", None):
+                _write_json(data, slow)
+            self.assertEqual(fast.read_text(encoding="utf-8"), slow.read_text(encoding="utf-8"))
+            self.assertEqual(json.loads(slow.read_text(encoding="utf-8")), data)
+
+
+class TestStreamingResults(unittest.TestCase):
+    """流式写出与一次性写出结果一致"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        graphs_dir = self.tmp / "graphs"
+        index = {}
+        for r, repo in enumerate(["a/x", "b/仓库"]):
+            months = {}
+            for m, month in enumerate(["2023-01", "2023-02"]):
+                g = nx.MultiDiGraph()
+                for i in range(5 + m + r):
+                    g.add_node(f"actor:{i}", node_type="Actor", login=f"u{i}", actor_id=i)
+                for i in range(1, 5 + m + r):
+                    g.add_edge("actor:0", f"actor:{i}")
+                path = graphs_dir / f"{r}-{month}.graphml"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                nx.write_graphml(g, path)
+                months[month] = str(path)
+            index[repo] = {"actor-actor": months}
+        with open(graphs_dir / "index.json", "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        self.graphs_dir = graphs_dir
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_streaming_matches_in_memory(self):
+        """full_analysis.json / summary.json 字节一致"""
+        outputs = {}
+        for stream in (False, True):
+            out = self.tmp / f"out-{stream}"
+            NewcomerAnalyzer(
+                graphs_dir=str(self.graphs_dir), output_dir=str(out), workers=1, stream_results=stream
+            ).run()
+            outputs[stream] = out
+        for name in ("full_analysis.json", "summary.json"):
+            self.assertEqual(
+                (outputs[False] / name).read_bytes(),
+                (outputs[True] / name).read_bytes(),
+            )
+        self.assertTrue((outputs[True] / "per_repo.jsonl").exists())
+
+    def test_repo_failure_aborts_in_both_modes(self):
+        """单进程与多进程模式下，单个项目出错都会中止运行，不写出缺项目的结果"""
+        original = NewcomerAnalyzer._analyze_single_repo
+
+        def failing(analyzer, repo_name, months):
+            if repo_name == "b/仓库":
+                raise RuntimeError("boom")
+            return original(analyzer, repo_name, months)
+
+        for workers in (1, 2):
+            out = self.tmp / f"out-fail-{workers}"
+            analyzer = NewcomerAnalyzer(graphs_dir=str(self.graphs_dir), output_dir=str(out), workers=workers)
+            # 线程池代替进程池，使 patch 在工作线程中生效
+            with mock.patch.object(NewcomerAnalyzer, "_analyze_single_repo", failing), \
+                    mock.patch("src.analysis.newcomer_analyzer.ProcessPoolExecutor", ThreadPoolExecutor):
+                with self.assertRaises(RuntimeError):
+                    analyzer.run()
+            self.assertFalse((out / "full_analysis.json").exists())
+            self.assertFalse((out / "summary.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+新人/核心演化详细报告单元测试
+"""
+
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.analysis.newcomer_detailed_report import (
+    _merge_monthly,
+    compute_score_bundle,
+    generate_repo_report,
+    iter_repo_items,
+    render_repo_reports,
+    write_monthly_csv,
+)
+
+
+def _repo(name: str, score: float) -> dict:
+    return {
+        "repo_name": name,
+        "three_layer_analysis": {"newcomer_distance": {"total_score": score}},
+    }
+
+
+class TestIterRepoItems(unittest.TestCase):
+    """输入读取测试"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.data = {"a/x": _repo("a/x", 1.5), "b/仓库": _repo("b/仓库", 3.0)}
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_json_and_jsonl_match(self):
+        """full_analysis.json 与 per_repo.jsonl 产出相同的项目序列"""
+        json_path = self.tmp / "full_analysis.json"
+        json_path.write_text(json.dumps(self.data, ensure_ascii=False, indent=2), encoding="utf-8")
+        jsonl_path = self.tmp / "per_repo.jsonl"
+        jsonl_path.write_text(
+            "".join(json.dumps(v, ensure_ascii=False) + "\n" for v in self.data.values()),
+            encoding="utf-8",
+        )
+        with mock.patch("src.analysis.newcomer_detailed_report.ijson", None):
+            from_json = list(iter_repo_items(json_path))
+        self.assertEqual(from_json, list(self.data.items()))
+        self.assertEqual(list(iter_repo_items(jsonl_path)), list(self.data.items()))
+
+    def test_nan_falls_back_to_stdlib(self):
+        """标准库 json 写出的 NaN 仍可读取"""
+        jsonl_path = self.tmp / "per_repo.jsonl"
+        jsonl_path.write_text('{"repo_name": "a/x", "score": NaN}\n', encoding="utf-8")
+        [(repo, repo_data)] = list(iter_repo_items(jsonl_path))
+        self.assertEqual(repo, "a/x")
+        self.assertNotEqual(repo_data["score"], repo_data["score"])
+
+    def test_parallel_render_matches_serial(self):
+        """多进程生成的报告与单进程一致"""
+        json_path = self.tmp / "full_analysis.json"
+        json_path.write_text(json.dumps(self.data, ensure_ascii=False), encoding="utf-8")
+        selected = {repo: compute_score_bundle(d) for repo, d in self.data.items()}
+        serial = render_repo_reports(json_path, selected, workers=1)
+        self.assertEqual(set(serial), set(selected))
+        with mock.patch("src.analysis.newcomer_detailed_report._MIN_PARALLEL_REPOS", 0):
+            self.assertEqual(render_repo_reports(json_path, selected, workers=2), serial)
+
+
+class TestScoreBundle(unittest.TestCase):
+    """评分结果测试"""
+
+    def test_bundle_scores_and_reuse(self):
+        """健康分、等级与扣分项；传入 bundle 与现算生成的报告一致"""
+        repo_data = {
+            "three_layer_analysis": {
+                "newcomer_distance": {"total_score": 12.5},
+                "unreachable_to_any_core_rate": {"total_score": 20.0},
+            }
+        }
+        bundle = compute_score_bundle(repo_data)
+        self.assertEqual(bundle.subscores, (12.5, 0, 0, 20.0))
+        self.assertEqual(bundle.total, 32.5)
+        self.assertEqual(bundle.health, 67.5)
+        self.assertEqual(bundle.level, "medium")
+        self.assertEqual(compute_score_bundle({}).level, "low")
+        report = generate_repo_report("a/x", repo_data, bundle)
+        self.assertEqual(report, generate_repo_report("a/x", repo_data))
+        self.assertIn("风险扣分: 12.5000", report)
+
+
+class TestMonthlyCsv(unittest.TestCase):
+    """月度指标 CSV 输出测试"""
+
+    def test_rows_follow_ranking_and_keep_raw_values(self):
+        """行按排名顺序输出，数值不做格式化，缺失值为空"""
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            data = {
+                "a/x": {"newcomer_distance": {"monthly_summary": [
+                    {"month": "2023-01", "newcomers": 3, "avg_shortest_path_to_core": 1.23456},
+                ]}},
+                "b/y": {"core_reachability": {"monthly_summary": [
+                    {"month": "2023-02", "unreachable_to_all_core_rate": 0.5},
+                ]}},
+            }
+            json_path = tmp / "full_analysis.json"
+            json_path.write_text(json.dumps(data), encoding="utf-8")
+            ranked = [("b/y", compute_score_bundle({})), ("a/x", compute_score_bundle({}))]
+            out = tmp / "report.csv"
+            self.assertEqual(write_monthly_csv(json_path, ranked, out), 2)
+            with open(out, encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([r["repo"] for r in rows], ["b/y", "a/x"])
+        self.assertEqual(rows[0]["unreachable_to_all_core_rate"], "0.5")
+        self.assertEqual(rows[0]["newcomers"], "")
+        self.assertEqual(rows[1]["rank"], "2")
+        self.assertEqual(rows[1]["avg_shortest_path_to_core"], "1.23456")
+
+
+class TestMergeMonthly(unittest.TestCase):
+    """月度表合并测试"""
+
+    def test_sorted_and_unsorted_inputs_agree(self):
+        """有序归并与建表回退结果一致；缺失月份为空 dict，同月重复取最后一条"""
+        a = [{"month": "2023-01", "v": 1}, {"month": "2023-03", "v": 3}]
+        b = [{"month": "2023-02", "v": 2}, {"month": "2023-02", "v": 22}]
+        c = [{"month": "2023-03", "v": 33}]
+        merged = list(_merge_monthly(a, b, c))
+        self.assertEqual([row[0] for row in merged], ["2023-01", "2023-02", "2023-03"])
+        self.assertEqual(merged[1], ("2023-02", {}, {"month": "2023-02", "v": 22}, {}))
+        self.assertEqual(merged[2][3], {"month": "2023-03", "v": 33})
+        self.assertEqual(list(_merge_monthly(a[::-1], b, c)), merged)
+
+
+if __name__ == "__main__":
+    unittest.main()
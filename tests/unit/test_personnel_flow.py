@@ -0,0 +1,236 @@
+"""
+人员流动分析器单元测试
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import networkx as nx
+
+from src.analysis.monthly_graph_builder import write_graphml_stream
+from src.analysis.personnel_flow import (
+    PersonnelFlowAnalyzer,
+    _dumps_json,
+    _extract_actors_fast,
+    _load_graph_actors,
+)
+
+
+class TestLoadGraphActors(unittest.TestCase):
+    """月度图读取测试"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_degrees_match_multidigraph_conversion(self):
+        """各类图的 (login, degree) 与转成 MultiDiGraph 后的结果一致（含自环与平行边）"""
+        for graph_cls in (nx.Graph, nx.MultiGraph, nx.DiGraph, nx.MultiDiGraph):
+            g = graph_cls()
+            g.add_node("a", login="alice")
+            g.add_edges_from([("a", "b"), ("a", "a"), ("b", "c"), ("a", "b")])
+            g.graph["total_events"] = 7
+            path = self.tmp / f"{graph_cls.__name__}.graphml"
+            nx.write_graphml(g, path)
+
+            read = nx.read_graphml(path)
+            mg = nx.MultiDiGraph(read if read.is_directed() else read.to_directed())
+            expected = [(mg.nodes[n].get("login", str(n)), d) for n, d in mg.degree()]
+            actors, total_events = _load_graph_actors(str(path))
+            self.assertEqual(actors, expected, graph_cls.__name__)
+            self.assertEqual(total_events, 7)
+
+    def test_streaming_parse_matches_networkx(self):
+        """流式解析不经过 NetworkX；未声明的节点按边中出现顺序追加"""
+        path = self.tmp / "g.graphml"
+        path.write_text(
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">'
+            '<key id="d0" for="node" attr.name="login" attr.type="string"/>'
+            '<key id="d1" for="graph" attr.name="total_events" attr.type="long"/>'
+            '<graph edgedefault="directed"><data key="d1">5</data>'
+            '<node id="a"><data key="d0">alice</data></node>'
+            '<edge source="z" target="a"/><edge source="a" target="a"/>'
+            '</graph></graphml>',
+            encoding="utf-8",
+        )
+        expected = ([("alice", 3), ("z", 1)], 5)
+        self.assertEqual(_extract_actors_fast(path), expected)
+        with mock.patch("src.analysis.personnel_flow.nx.read_graphml") as read:
+            self.assertEqual(_load_graph_actors(str(path)), expected)
+            read.assert_not_called()
+
+    def test_empty_data_matches_networkx(self):
+        """空 login 解析为空串（与 nx.read_graphml 一致）；非字符串 key 的空值交给 NetworkX 解析"""
+        for writer in (nx.write_graphml, write_graphml_stream):
+            g = nx.MultiDiGraph(total_events=2)
+            g.add_node("actor:1", login="")
+            g.add_node("actor:2", login="bob")
+            g.add_edge("actor:1", "actor:2")
+            path = self.tmp / f"{writer.__name__}.graphml"
+            writer(g, str(path))
+            self.assertEqual(_extract_actors_fast(path), ([("", 1), ("bob", 1)], 2), writer.__name__)
+
+        path = self.tmp / "empty_total.graphml"
+        path.write_text(
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">'
+            '<key id="d0" for="graph" attr.name="total_events" attr.type="long"/>'
+            '<graph edgedefault="directed"><data key="d0"/><node id="a"/></graph></graphml>',
+            encoding="utf-8",
+        )
+        self.assertIsNone(_extract_actors_fast(path))
+        expected_total = nx.read_graphml(path).graph.get("total_events", 0)
+        self.assertEqual(_load_graph_actors(str(path)), ([("a", 0)], expected_total))
+
+    def test_unsupported_graphml_falls_back(self):
+        """无命名空间等流式解析不处理的文件回退到 NetworkX"""
+        path = self.tmp / "g.graphml"
+        path.write_text(
+            '<graphml><graph edgedefault="undirected">'
+            '<node id="a"/><edge source="a" target="b"/></graph></graphml>',
+            encoding="utf-8",
+        )
+        self.assertIsNone(_extract_actors_fast(path))
+        self.assertEqual(_load_graph_actors(str(path)), ([("a", 2), ("b", 2)], 0))
+
+    def test_missing_file_returns_none(self):
+        """读取失败时返回 None"""
+        self.assertIsNone(_load_graph_actors(str(self.tmp / "missing.graphml")))
+
+    def test_parallel_loading_matches_serial(self):
+        """多进程读取月度图与单进程结果一致（顺序、缺失文件跳过）"""
+        graphs_dir = self.tmp / "graphs"
+        graphs_dir.mkdir()
+        index = {}
+        for repo in ("a/x", "b/y"):
+            months = {}
+            for month, n_edges in (("2023-01", 2), ("2023-02", 3)):
+                g = nx.DiGraph(total_events=n_edges)
+                for i in range(n_edges):
+                    g.add_node(f"n{i}", login=f"user{i}")
+                    g.add_edge(f"n{i}", "n0")
+                path = graphs_dir / f"{repo.replace('/', '-')}-{month}.graphml"
+                nx.write_graphml(g, path)
+                months[month] = str(path)
+            index[repo] = {"actor-actor": months}
+        index["b/y"]["actor-actor"]["2023-03"] = str(graphs_dir / "missing.graphml")
+        (graphs_dir / "index.json").write_text(json.dumps(index), encoding="utf-8")
+
+        results = []
+        for workers in (1, 2):
+            analyzer = PersonnelFlowAnalyzer(
+                output_dir=str(self.tmp / "out"),
+                graphs_dir=str(graphs_dir),
+                workers=workers,
+            )
+            results.append(analyzer._build_all_actors_data_from_graphs(["b/y", "a/x", "c/z"]))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(list(results[0]), ["b/y", "a/x"])
+        self.assertEqual([m["month"] for m in results[0]["b/y"]["metrics"]], ["2023-01", "2023-02"])
+
+    def test_cache_hit_and_invalidation(self):
+        """缓存命中时不再解析 GraphML；图文件变化后缓存失效"""
+        path = self.tmp / "g.graphml"
+        g = nx.DiGraph(total_events=3)
+        g.add_edge("a", "b")
+        nx.write_graphml(g, path)
+        cache_dir = self.tmp / "cache"
+
+        cold = _load_graph_actors(str(path), cache_dir)
+        self.assertEqual(len(list(cache_dir.glob("*.pkl"))), 1)
+        with mock.patch("src.analysis.personnel_flow.nx.read_graphml") as read:
+            self.assertEqual(_load_graph_actors(str(path), cache_dir), cold)
+            read.assert_not_called()
+
+        g.add_edge("c", "a")
+        nx.write_graphml(g, path)
+        actors, _ = _load_graph_actors(str(path), cache_dir)
+        self.assertEqual(len(actors), 3)
+
+    def test_cache_disabled_writes_nothing(self):
+        """cache_dir 为 None 时不写缓存"""
+        path = self.tmp / "g.graphml"
+        nx.write_graphml(nx.DiGraph(), path)
+        _load_graph_actors(str(path))
+        self.assertFalse(any(self.tmp.rglob("*.pkl")))
+
+
+class TestJsonOutput(unittest.TestCase):
+    """结果 JSON 序列化测试"""
+
+    def test_matches_stdlib_json(self):
+        """与 json.dump(indent=2, ensure_ascii=False) 逐字节一致（含 int 键、非 ASCII、空容器）"""
+        data = {
+            "仓库/x": {
+                "retention_rates": {1: 0.5, 12: 1.0},
+                "join_events": [],
+                "summary": {"avg_tenure_months": 2.25, "critical_departures": 0},
+                "flowed_to": [{"repo": "b/y", "first_month": "2023-02"}],
+            },
+            "empty": {},
+        }
+        expected = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        self.assertEqual(_dumps_json(data), expected)
+        with mock.patch("src.analysis.personnel_flow.orjson", None):
+            self.assertEqual(_dumps_json(data), expected)
+
+
+class TestMonthDiffPass(unittest.TestCase):
+    """相邻月份核心成员比较测试"""
+
+    def test_events_and_churn_agree(self):
+        """流入/流出事件与各期统计一致，首月全部计为流入"""
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = PersonnelFlowAnalyzer(output_dir=tmp)
+            metrics = [
+                {"month": "2023-01", "core_actors": [["a", 5], ["b", 3]]},
+                {"month": "2023-02", "core_actors": [["b", 4], ["c", 2]]},
+                {"month": "2023-03", "core_actors": [["c", 1]]},
+            ]
+            core_by_month = analyzer._extract_core_per_month(metrics)
+            timelines = analyzer._build_member_timelines(core_by_month)
+            joins, leaves, churn = analyzer._month_diff_pass(core_by_month, "a/x", timelines)
+        self.assertEqual(sorted((e["month"], e["login"]) for e in joins),
+                         [("2023-01", "a"), ("2023-01", "b"), ("2023-02", "c")])
+        self.assertEqual(sorted((e["month"], e["login"]) for e in leaves),
+                         [("2023-02", "a"), ("2023-03", "b")])
+        self.assertEqual([(c["joined"], c["left"], c["net_change"]) for c in churn],
+                         [(2, 0, 2), (1, 1, 0), (0, 1, -1)])
+
+
+class TestFlowDestinations(unittest.TestCase):
+    """跨 repo 流向测试"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.analyzer = PersonnelFlowAnalyzer(output_dir=self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_window_and_first_appearance(self):
+        """只取离开当月起 N 个月内、其它 repo 的首次出现"""
+        data = {
+            "a/x": {"metrics": [{"month": "2022-12", "core_actors": [["u", 1]]}]},
+            "b/y": {"metrics": [
+                {"month": "2022-11", "core_actors": [["u", 2]]},
+                {"month": "2023-02", "core_actors": [["v", 5], ["u", 3]]},
+                {"month": "2023-03", "core_actors": [["u", 4]]},
+            ]},
+            "c/z": {"metrics": [{"month": "2024-01", "core_actors": [["u", 6]]}]},
+        }
+        index = self.analyzer._build_global_core_index(data)
+        flow = self.analyzer._find_flow_destinations("u", "a/x", "2023-01", index, months_after=11)
+        self.assertEqual(flow, [{"repo": "b/y", "first_month": "2023-02", "rank": 2, "degree": 3}])
+        unbounded = self.analyzer._find_flow_destinations("u", "a/x", "2023-01", index, months_after=-1)
+        self.assertEqual([f["repo"] for f in unbounded], ["b/y", "c/z"])
+
+
+if __name__ == "__main__":
+    unittest.main()